@@ -0,0 +1,201 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.image import imsave
+from matplotlib.lines import Line2D
+
+from crystal_viewer import CrystalViewer
+from path_viewer import LEG_CLASSES, plot_paths
+from spatial_index import CellList
+
+# Formats that are composited from a cached raster of the crystal
+RASTER_FORMATS = ('png',)
+VIEWS = ('3d', 'xy', 'xz', 'yz')
+
+
+class PathRenderer:
+    """
+    Render path overlays on top of a crystal figure that is built only once.
+
+    The crystal artists are created in the constructor and kept; for every
+    path only the overlay artists are added, drawn and removed again. For
+    raster output the crystal is rasterised once and each path is blitted
+    onto a copy of that background, so the crystal is never redrawn. Vector
+    formats (svg, pdf) still reuse the crystal artists but need a full draw.
+
+    Parameters:
+    -----------
+    structure : Structure
+        Crystal atoms
+    dot_size : int, optional
+        Size of the scatter points (default: 100)
+    show_labels : bool, optional
+        Whether to show atom labels (default: False)
+    dpi : int, optional
+        Resolution of raster output (default: 100)
+    show_bonds : bool, optional
+        Draw the bonds of the crystal (default: False)
+    bond_tolerance : float, optional
+        Bond tolerance in Angstrom (default: 0.45)
+    lod_atoms, max_labels, max_3d_atoms, max_2d_atoms : optional
+        Level-of-detail thresholds, see CrystalViewer; the path overlays are
+        always vector artists
+    """
+
+    def __init__(self, structure, dot_size=100, show_labels=False, dpi=100, show_bonds=False,
+                 bond_tolerance=0.45, lod_atoms=10000, max_labels=300, max_3d_atoms=5000,
+                 max_2d_atoms=10000):
+        viewer = CrystalViewer(None, dot_size=dot_size, show_labels=show_labels,
+                               structure=structure, show_bonds=show_bonds,
+                               bond_tolerance=bond_tolerance, lod_atoms=lod_atoms,
+                               max_labels=max_labels, max_3d_atoms=max_3d_atoms,
+                               max_2d_atoms=max_2d_atoms)
+        self.fig, self.ax3d, *self.views = viewer.plot_all_views()
+        self.fig.set_dpi(dpi)
+        self.dpi = dpi
+
+        # The legend is part of the background, so it lists every leg class
+        handles = list(viewer.legend_handles)
+        labels = [h.get_label() for h in handles]
+        for name, color in LEG_CLASSES:
+            handles.append(Line2D([], [], color=color))
+            labels.append(name)
+        self.ax3d.legend(handles, labels)
+
+        # Freeze the crystal limits so overlays never trigger a relayout
+        for ax in self.axes:
+            ax.set_autoscale_on(False)
+        self._background = None
+        self._view_boxes = {}
+
+    @property
+    def axes(self):
+        return [self.ax3d] + self.views
+
+    def render(self, path_atoms, out_file, fmt=None, view=None):
+        """
+        Draw the given paths (list of Structure) over the crystal and save to out_file.
+
+        ``out_file`` may also be a binary file object when ``fmt`` is given.
+        ``view`` restricts the output to one panel ('3d', 'xy', 'xz' or
+        'yz'); by default all four are saved.
+        """
+        if view is not None and view not in VIEWS:
+            raise ValueError(f"Unknown view {view!r}; expected one of {VIEWS}")
+        fmt = (fmt or os.path.splitext(out_file)[1].lstrip('.')).lower()
+        before = {ax: set(ax.get_children()) for ax in self.axes}
+        plot_paths(path_atoms, self.fig, self.ax3d, *self.views, legend=False)
+        overlay = {ax: [a for a in ax.get_children() if a not in before[ax]] for ax in self.axes}
+        try:
+            if fmt in RASTER_FORMATS:
+                self._blit(overlay, out_file, view)
+            else:
+                bbox = None
+                if view is not None:
+                    bbox = self._view_box(view).transformed(self.fig.dpi_scale_trans.inverted())
+                self.fig.savefig(out_file, dpi=self.dpi, format=fmt, bbox_inches=bbox)
+        finally:
+            for artists in overlay.values():
+                for artist in artists:
+                    artist.remove()
+        return out_file
+
+    def _view_box(self, view):
+        """Pixel extent of one panel with its labels; fixed once the crystal is drawn."""
+        if view not in self._view_boxes:
+            ax = dict(zip(VIEWS, self.axes))[view]
+            self._view_boxes[view] = ax.get_tightbbox(self.fig.canvas.get_renderer())
+        return self._view_boxes[view]
+
+    def _blit(self, overlay, out_file, view=None):
+        canvas = self.fig.canvas
+        if self._background is None:
+            # Hide the overlay for the one full draw of the crystal
+            for artists in overlay.values():
+                for artist in artists:
+                    artist.set_visible(False)
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+            for artists in overlay.values():
+                for artist in artists:
+                    artist.set_visible(True)
+        else:
+            canvas.restore_region(self._background)
+        for ax, artists in overlay.items():
+            for artist in artists:
+                if hasattr(artist, 'do_3d_projection'):
+                    artist.do_3d_projection()
+                ax.draw_artist(artist)
+        image = np.asarray(canvas.buffer_rgba())
+        if view is not None:
+            x0, y0, x1, y1 = np.round(self._view_box(view).extents).astype(int)
+            height, width = image.shape[:2]
+            image = image[max(height - y1, 0):height - max(y0, 0), max(x0, 0):min(x1, width)]
+        # Fast zlib level: encoding dominates a blitted frame, files grow by only a few percent
+        imsave(out_file, image, dpi=self.dpi, format='png', pil_kwargs={'compress_level': 1})
+
+
+# Per-process renderer, created by the pool initializer
+_renderer = None
+
+def _init_worker(structure, options):
+    global _renderer
+    plt.switch_backend('Agg')
+    _renderer = PathRenderer(structure, **options)
+
+def _render_job(job):
+    path_atoms, out_file = job
+    return _renderer.render([path_atoms], out_file)
+
+
+def render_paths(structure, paths, out_dir, fmt='png', workers=None, crop=None, **options):
+    """
+    Render every path over the crystal to ``out_dir/feffNNNN.<fmt>``, headless.
+
+    Parameters:
+    -----------
+    structure : Structure
+        Crystal atoms
+    paths : list of FeffPath
+        Paths to render, one image each
+    out_dir : str
+        Output directory (created if needed)
+    fmt : str, optional
+        png, svg or pdf (default: png)
+    workers : int, optional
+        Number of worker processes (default: CPU count). ``1`` renders in
+        this process.
+    crop : float, optional
+        Only draw crystal atoms within this radius of the absorber
+    **options
+        dot_size, show_labels, dpi, show_bonds, bond_tolerance and the
+        level-of-detail thresholds, passed to PathRenderer
+
+    Returns:
+    --------
+    list of str
+        Written files, in the order of ``paths``
+    """
+    if crop is not None:
+        index = CellList(structure.coords)
+        structure = structure.subset(index.crop(structure.coords[structure.absorber_index()], crop))
+    if options.get('show_bonds'):
+        # Find the bonds once here; they travel to the workers with the structure
+        structure.bonds(options.get('bond_tolerance', 0.45))
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(p.atoms, os.path.join(out_dir, f"feff{p.index:04d}.{fmt}")) for p in paths]
+    if not jobs:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    if workers == 1:
+        _init_worker(structure, options)
+        return [_render_job(job) for job in jobs]
+
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(structure, options)) as pool:
+        return list(pool.map(_render_job, jobs, chunksize=chunksize))
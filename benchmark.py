@@ -0,0 +1,267 @@
+"""
+Benchmarks for parsing and rendering on synthetic FEFF data.
+
+Synthetic feff.inp clusters and FEFF runs (feffNNNN.dat, files.dat and
+paths.dat) are generated at the requested scales in a temporary directory,
+then every stage is timed separately (best of --repeat runs) and traced once
+with tracemalloc for its peak memory. Results can be stored as a JSON
+baseline and later runs compared against it; a stage slower than the
+baseline by more than --threshold counts as a regression and makes the
+script exit with status 1. Runs offline with the Agg backend.
+
+Usage:
+    python benchmark.py --atoms 100 1000 10000 --paths 1 100 1000
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --threshold 0.25
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from chi import ChiEngine
+from crystal_viewer import CrystalViewer
+from feff_io import read_feff_inp
+from path_collection import load_feff_run
+from path_viewer import plot_paths
+from paths_dat import PathsDat
+
+ELEMENTS = (('Fe', 26), ('O', 8), ('C', 6), ('N', 7))
+
+
+def write_feff_inp(inp_file, n_atoms, seed=0):
+    """Write a feff.inp with a random cluster of n_atoms around an Fe absorber."""
+    rng = np.random.default_rng(seed)
+    radius = max(3.0, (n_atoms / 0.08) ** (1 / 3) / 2)
+    coords = rng.uniform(-radius, radius, (n_atoms, 3))
+    coords[0] = 0.0
+    dist = np.linalg.norm(coords, axis=1)
+    order = np.argsort(dist)
+    ipots = np.concatenate(([0], rng.integers(1, len(ELEMENTS) + 1, n_atoms - 1)))
+    with open(inp_file, 'w') as f:
+        f.write("TITLE synthetic benchmark cluster\n\nPOTENTIALS\n*  ipot   Z  tag\n")
+        f.write(f"   0   {ELEMENTS[0][1]}  {ELEMENTS[0][0]}\n")
+        for ipot, (tag, z) in enumerate(ELEMENTS, start=1):
+            f.write(f"   {ipot}   {z}  {tag}\n")
+        f.write("\nATOMS\n*   x          y          z     ipot  tag   distance site_info\n")
+        for i, k in enumerate(order):
+            x, y, z = coords[k]
+            tag = ELEMENTS[max(ipots[k] - 1, 0)][0]
+            f.write(f"  {x:9.5f}  {y:9.5f}  {z:9.5f}   {ipots[k]}  {tag:2s}  "
+                    f"{dist[k]:9.5f}  {tag}{i}\n")
+        f.write("END\n")
+
+
+def _random_path(rng, nleg):
+    coords = np.vstack([np.zeros(3), rng.uniform(-4.0, 4.0, (nleg - 1, 3))])
+    legs = np.linalg.norm(np.roll(coords, -1, axis=0) - coords, axis=1)
+    return coords, legs.sum() / 2
+
+
+def write_feff_run(run_dir, n_paths, seed=0, nk=201):
+    """Write feffNNNN.dat, files.dat and paths.dat for n_paths random paths."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(run_dir, exist_ok=True)
+    k = np.linspace(0.0, 20.0, nk)
+    files_rows, paths_blocks = [], []
+    for index in range(1, n_paths + 1):
+        nleg = int(rng.integers(2, 5))
+        coords, reff = _random_path(rng, nleg)
+        deg = float(rng.integers(1, 25))
+        ipots = np.concatenate(([0], rng.integers(1, len(ELEMENTS) + 1, nleg - 1)))
+        with open(os.path.join(run_dir, f"feff{index:04d}.dat"), 'w') as f:
+            f.write(" synthetic benchmark path                          Feff 9.6.4\n")
+            f.write(f" Path {index:4d}      icalc       2\n")
+            f.write(" " + "-" * 71 + "\n")
+            f.write(f"   {nleg}  {deg:6.3f}  {reff:7.4f}  2.7770  -4.50504 "
+                    "nleg, deg, reff, rnrmav(bohr), edge\n")
+            f.write("        x         y         z   pot at#\n")
+            for (x, y, z), ipot in zip(coords, ipots):
+                tag, znum = ELEMENTS[max(ipot - 1, 0)]
+                f.write(f"  {x:8.4f}  {y:8.4f}  {z:8.4f}  {ipot}  {znum:2d} {tag}\n")
+            f.write("    k   real[2*phc]   mag[feff]  phase[feff] red factor   lambda     real[p]@#\n")
+            table = np.column_stack((k, 2.0 - 0.1 * k, 0.5 * np.exp(-k / 5.0), 0.1 * k + index,
+                                     np.full(nk, 0.9), 5.0 + k, np.sqrt(k * k + 1.0)))
+            np.savetxt(f, table, fmt='%11.4E')
+        files_rows.append(f" feff{index:04d}.dat   0.00000  {rng.uniform(5, 100):8.3f}  "
+                          f"{deg:8.3f}  {nleg:4d}  {reff:8.4f}\n")
+        block = [f"  {index:4d}  {nleg:4d}  {deg:6.3f}  index, nleg, degeneracy, r=  {reff:7.4f}\n",
+                 "      x           y           z     ipot  label      rleg      beta        eta\n"]
+        for j in list(range(1, nleg)) + [0]:
+            tag = ELEMENTS[max(ipots[j] - 1, 0)][0]
+            x, y, z = coords[j]
+            block.append(f"  {x:12.6f}{y:12.6f}{z:12.6f}  {ipots[j]} '{tag:6s}'   2.0000  "
+                         "180.0000    0.0000\n")
+        paths_blocks.append(''.join(block))
+    with open(os.path.join(run_dir, 'files.dat'), 'w') as f:
+        f.write(" synthetic benchmark run\n " + "-" * 71 + "\n")
+        f.write("    file        sig2   amp ratio    deg    nlegs  r effective\n")
+        f.writelines(files_rows)
+    with open(os.path.join(run_dir, 'paths.dat'), 'w') as f:
+        f.write(" synthetic benchmark run\n " + "-" * 71 + "\n")
+        f.writelines(paths_blocks)
+
+
+def measure(fn, repeat=3, memory=True):
+    """Best wall time of ``repeat`` calls, tracemalloc peak of one more call, and its result."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            result = fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak, result
+
+
+def bench_structure(tmp, n_atoms, repeat, memory):
+    """Time parsing, artist construction, draw and PNG save for one cluster size."""
+    inp_file = os.path.join(tmp, f"feff_{n_atoms}.inp")
+    write_feff_inp(inp_file, n_atoms)
+    results = {}
+
+    def record(stage, fn):
+        seconds, peak, result = measure(fn, repeat, memory)
+        results[f"{stage}@atoms={n_atoms}"] = {'seconds': seconds, 'peak_mb': _mb(peak)}
+        return result
+
+    structure = record('parse_inp', lambda: read_feff_inp(inp_file))
+
+    def build():
+        plt.close('all')
+        return CrystalViewer(None, structure=structure).plot_all_views()
+    fig = record('build_artists', build)[0]
+    record('draw', lambda: fig.canvas.draw())
+    record('save_png', lambda: fig.savefig(io.BytesIO(), format='png'))
+    plt.close('all')
+    return results
+
+
+def bench_paths(tmp, n_paths, repeat, memory, workers):
+    """Time run loading, paths.dat indexing, chi(k) and the path overlay for one run size."""
+    run_dir = os.path.join(tmp, f"run_{n_paths}")
+    write_feff_run(run_dir, n_paths)
+    results = {}
+
+    def record(stage, fn):
+        seconds, peak, result = measure(fn, repeat, memory)
+        results[f"{stage}@paths={n_paths}"] = {'seconds': seconds, 'peak_mb': _mb(peak)}
+        return result
+
+    collection = record('parse_run', lambda: load_feff_run(run_dir, workers=workers))
+
+    def index_paths_dat():
+        with PathsDat(os.path.join(run_dir, 'paths.dat')) as paths:
+            return len(paths)
+    record('index_paths_dat', index_paths_dat)
+
+    engine = ChiEngine(collection)
+    record('chi_k', lambda: engine.chi(sigma2=0.003, de0=1.0).sum(axis=0))
+
+    path_atoms = [p.atoms for p in collection]
+
+    def overlay():
+        plt.close('all')
+        return plot_paths(path_atoms)
+    fig = record('overlay_artists', overlay)[0]
+    record('overlay_draw', lambda: fig.canvas.draw())
+    plt.close('all')
+    return results
+
+
+def _mb(nbytes):
+    return None if nbytes is None else nbytes / 1024 ** 2
+
+
+def compare(results, baseline, threshold, min_delta=0.005):
+    """Return the (key, seconds, baseline seconds) of every regressed stage."""
+    regressions = []
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        limit = base['seconds'] * (1.0 + threshold)
+        if entry['seconds'] > limit and entry['seconds'] - base['seconds'] > min_delta:
+            regressions.append((key, entry['seconds'], base['seconds']))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    print(f"{'stage':36s} {'time (ms)':>11s} {'peak (MB)':>10s} {'baseline':>10s} {'ratio':>7s}")
+    for key, entry in results.items():
+        peak = '-' if entry['peak_mb'] is None else f"{entry['peak_mb']:.1f}"
+        line = f"{key:36s} {entry['seconds'] * 1e3:11.2f} {peak:>10s}"
+        base = (baseline or {}).get(key)
+        if base is not None:
+            line += f" {base['seconds'] * 1e3:10.2f} {entry['seconds'] / base['seconds']:7.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing and rendering on synthetic FEFF data')
+    parser.add_argument('--atoms', type=int, nargs='*', default=[100, 1000, 10000],
+                        help='Cluster sizes to benchmark (default: 100 1000 10000)')
+    parser.add_argument('--paths', type=int, nargs='*', default=[1, 100, 1000],
+                        help='Number of paths per synthetic run (default: 1 100 1000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timed repetitions per stage; the best is kept (default: 3)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for run parsing (default: CPU count)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the tracemalloc pass that records peak memory')
+    parser.add_argument('--baseline', default=None,
+                        help='JSON baseline to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline (default: 0.25 = 25%%)')
+    parser.add_argument('--save-baseline', default=None,
+                        help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='exafs_bench_') as tmp:
+        for n_atoms in args.atoms:
+            results.update(bench_structure(tmp, n_atoms, args.repeat, not args.no_memory))
+        for n_paths in args.paths:
+            results.update(bench_paths(tmp, n_paths, args.repeat, not args.no_memory, args.workers))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        meta = {'python': sys.version.split()[0], 'numpy': np.__version__,
+                'matplotlib': matplotlib.__version__, 'machine': platform.machine(),
+                'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for key, seconds, base in regressions:
+            print(f"REGRESSION {key}: {seconds * 1e3:.2f} ms vs baseline {base * 1e3:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import re
+import warnings
+
+import numpy as np
+
+from spatial_index import CellList
+
+# Single-bond covalent radii in Angstrom (Cordero et al., Dalton Trans. 2008)
+COVALENT_RADII = {
+    'H': 0.31, 'He': 0.28, 'Li': 1.28, 'Be': 0.96, 'B': 0.84, 'C': 0.76, 'N': 0.71, 'O': 0.66,
+    'F': 0.57, 'Ne': 0.58, 'Na': 1.66, 'Mg': 1.41, 'Al': 1.21, 'Si': 1.11, 'P': 1.07, 'S': 1.05,
+    'Cl': 1.02, 'Ar': 1.06, 'K': 2.03, 'Ca': 1.76, 'Sc': 1.70, 'Ti': 1.60, 'V': 1.53, 'Cr': 1.39,
+    'Mn': 1.39, 'Fe': 1.32, 'Co': 1.26, 'Ni': 1.24, 'Cu': 1.32, 'Zn': 1.22, 'Ga': 1.22, 'Ge': 1.20,
+    'As': 1.19, 'Se': 1.20, 'Br': 1.20, 'Kr': 1.16, 'Rb': 2.20, 'Sr': 1.95, 'Y': 1.90, 'Zr': 1.75,
+    'Nb': 1.64, 'Mo': 1.54, 'Tc': 1.47, 'Ru': 1.46, 'Rh': 1.42, 'Pd': 1.39, 'Ag': 1.45, 'Cd': 1.44,
+    'In': 1.42, 'Sn': 1.39, 'Sb': 1.39, 'Te': 1.38, 'I': 1.39, 'Xe': 1.40, 'Cs': 2.44, 'Ba': 2.15,
+    'La': 2.07, 'Ce': 2.04, 'Pr': 2.03, 'Nd': 2.01, 'Sm': 1.98, 'Eu': 1.98, 'Gd': 1.96, 'Tb': 1.94,
+    'Dy': 1.92, 'Ho': 1.92, 'Er': 1.89, 'Tm': 1.90, 'Yb': 1.87, 'Lu': 1.87, 'Hf': 1.75, 'Ta': 1.70,
+    'W': 1.62, 'Re': 1.51, 'Os': 1.44, 'Ir': 1.41, 'Pt': 1.36, 'Au': 1.36, 'Hg': 1.32, 'Tl': 1.45,
+    'Pb': 1.46, 'Bi': 1.48, 'Th': 2.06, 'U': 1.96,
+}
+DEFAULT_RADIUS = 1.5
+# Closer pairs are taken as duplicate sites, not bonds
+MIN_BOND_LENGTH = 0.4
+_SYMBOL_RE = re.compile(r'[A-Za-z]{1,2}')
+# Tags already reported as falling back to DEFAULT_RADIUS
+_unknown_tags = set()
+
+
+def element_symbol(tag):
+    """
+    Element symbol of a feff.inp tag such as ``Fe1``, ``O_1`` or ``fe``.
+
+    The leading one or two letters are matched against COVALENT_RADII,
+    two-letter symbols first. Returns None if neither is an element.
+    """
+    match = _SYMBOL_RE.match(tag)
+    if match is None:
+        return None
+    letters = match.group(0)
+    for symbol in (letters.capitalize(), letters[0].upper()):
+        if symbol in COVALENT_RADII:
+            return symbol
+    return None
+
+
+def covalent_radius(element):
+    """Covalent radius of an element symbol or tag (DEFAULT_RADIUS, with a warning, if unknown)."""
+    symbol = element_symbol(element)
+    if symbol is not None:
+        return COVALENT_RADII[symbol]
+    if element not in _unknown_tags:
+        _unknown_tags.add(element)
+        warnings.warn(f"No covalent radius for tag {element!r}; using {DEFAULT_RADIUS} Angstrom",
+                      stacklevel=2)
+    return DEFAULT_RADIUS
+
+
+def find_bonds(structure, tolerance=0.45, radii=None):
+    """
+    Bonded atom pairs of a structure.
+
+    Two atoms are bonded when their distance is at most the sum of their
+    covalent radii plus ``tolerance``. Candidate pairs come from one
+    CellList neighbour pass with the largest possible bond length as cutoff,
+    so the cost is O(n) for clusters of normal density.
+
+    Parameters:
+    -----------
+    structure : Structure
+        Atoms to connect
+    tolerance : float, optional
+        Slack added to the radius sum in Angstrom (default: 0.45)
+    radii : dict, optional
+        Tag -> radius overrides of COVALENT_RADII
+
+    Returns:
+    --------
+    ndarray of int, shape (m, 2)
+        Atom index pairs, i < j
+    """
+    radii = dict(radii or {})
+    element_radii = np.array([radii[e] if e in radii else covalent_radius(e)
+                              for e in structure.element_names])
+    if not len(structure) or not len(element_radii):
+        return np.empty((0, 2), dtype=np.intp)
+    atom_radii = element_radii[structure.element_codes]
+    cutoff = 2 * element_radii.max() + tolerance
+    i, j, d = CellList(structure.coords, cell_size=cutoff).pairs(cutoff)
+    bonded = (d <= atom_radii[i] + atom_radii[j] + tolerance) & (d >= MIN_BOND_LENGTH)
+    return np.column_stack((i[bonded], j[bonded]))
@@ -0,0 +1,156 @@
+import numpy as np
+
+from feff_io import FEFF_DATA_COLUMNS
+
+# 2 m_e / hbar^2 in 1/(Angstrom^2 eV): k^2 = ETOK * E
+ETOK = 0.2624682843
+_PHC, _MAG, _PHASE, _RED, _LAMBDA = (FEFF_DATA_COLUMNS.index(c)
+                                     for c in ('phc', 'mag', 'phase', 'red_factor', 'lambda'))
+
+
+class ChiEngine:
+    """
+    Batch evaluation of path EXAFS chi(k) from feffNNNN.dat scattering tables.
+
+    The tables of all paths are brought onto one k grid and stacked into
+    (paths, nk) arrays when the engine is built. Evaluating chi(k) is then a
+    handful of array operations over the whole (paths, k) grid:
+
+        chi_j(k) = S0^2 N_j |F_j(k')| red_j(k') / (k' R_j^2)
+                   * exp(-2 R_j / lambda_j(k')) * exp(-2 sigma2_j k'^2)
+                   * sin(2 k' R_j + 2 delta_c(k') + phi_j(k'))
+
+    with R_j = reff_j + dR_j and k'^2 = k^2 - ETOK dE0_j.
+
+    Parameters:
+    -----------
+    paths : list of FeffPath
+        Paths read from feffNNNN.dat files (with scattering data)
+    k : array_like, optional
+        Output k grid in 1/Angstrom (default: 0 to the table maximum in
+        steps of 0.05)
+    """
+
+    def __init__(self, paths, k=None):
+        paths = list(paths)
+        missing = [p.index for p in paths if p.data is None]
+        if missing:
+            raise ValueError(f"Paths without scattering data: {missing}")
+        if not paths:
+            raise ValueError("ChiEngine needs at least one path")
+        short = [p.index for p in paths if len(p.data) < 2]
+        if short:
+            raise ValueError(f"Paths with fewer than 2 rows of scattering data: {short}")
+        self.paths = paths
+        self.index = np.array([p.index for p in paths], dtype=np.int64)
+        self.reff = np.array([p.reff for p in paths], dtype=np.float64)
+        self.degeneracy = np.array([p.degeneracy for p in paths], dtype=np.float64)
+
+        # Common table grid: that of the first path; other grids are resampled once
+        self.k_table = paths[0].column('k').copy()
+        amp, phase, lam = [], [], []
+        for p in paths:
+            table = p.data
+            columns = (table[:, _MAG] * table[:, _RED],
+                       np.unwrap(table[:, _PHC] + table[:, _PHASE]),
+                       table[:, _LAMBDA])
+            if len(table) != len(self.k_table) or not np.allclose(table[:, 0], self.k_table):
+                columns = [np.interp(self.k_table, table[:, 0], c) for c in columns]
+            amp.append(columns[0])
+            phase.append(columns[1])
+            lam.append(columns[2])
+        self.amp = np.array(amp)
+        self.phase = np.array(phase)
+        self.lam = np.array(lam)
+
+        self.k = (np.arange(0.0, self.k_table[-1] + 1e-9, 0.05) if k is None
+                  else np.asarray(k, dtype=np.float64))
+        self._interp_key = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _per_path(self, value):
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (len(self),))
+
+    def _tables_at(self, de0):
+        """Amplitude, phase and lambda at k' for every path, cached on dE0."""
+        key = de0.tobytes()
+        if key == self._interp_key:
+            return self._interp
+        kp2 = self.k[None, :] ** 2 - ETOK * de0[:, None]
+        kp = np.sqrt(np.clip(kp2, 0.0, None))
+        # Vectorised linear interpolation of every row onto its own k' grid
+        kt = self.k_table
+        i = np.clip(np.searchsorted(kt, kp) - 1, 0, len(kt) - 2)
+        w = np.clip((kp - kt[i]) / (kt[i + 1] - kt[i]), 0.0, 1.0)
+        rows = np.arange(len(self))[:, None]
+        tables = [(1.0 - w) * t[rows, i] + w * t[rows, i + 1]
+                  for t in (self.amp, self.phase, self.lam)]
+        self._interp_key, self._interp = key, (kp, *tables)
+        return self._interp
+
+    def chi(self, s02=1.0, sigma2=0.0, de0=0.0, dr=0.0, degeneracy=None, kweight=0):
+        """
+        chi(k) of every path on the output grid.
+
+        All parameters accept a scalar (shared by all paths) or one value per
+        path.
+
+        Parameters:
+        -----------
+        s02 : float or array_like
+            Amplitude reduction factor S0^2 (default: 1.0)
+        sigma2 : float or array_like
+            Debye-Waller factor in Angstrom^2 (default: 0.0)
+        de0 : float or array_like
+            Energy shift in eV (default: 0.0)
+        dr : float or array_like
+            Change of the half path length in Angstrom (default: 0.0)
+        degeneracy : float or array_like, optional
+            Path degeneracy N (default: the FEFF degeneracy of each path)
+        kweight : int, optional
+            Return k^kweight * chi(k) (default: 0)
+
+        Returns:
+        --------
+        ndarray, shape (paths, nk)
+        """
+        s02 = self._per_path(s02)[:, None]
+        sigma2 = self._per_path(sigma2)[:, None]
+        de0 = np.ascontiguousarray(self._per_path(de0))
+        r = (self.reff + self._per_path(dr))[:, None]
+        n = (self.degeneracy if degeneracy is None else self._per_path(degeneracy))[:, None]
+
+        kp, amp, phase, lam = self._tables_at(de0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chi = (s02 * n * amp / (kp * r * r)
+                   * np.exp(-2.0 * r / lam - 2.0 * sigma2 * kp * kp)
+                   * np.sin(2.0 * kp * r + phase))
+        chi = np.where(kp > 0, chi, 0.0)
+        if kweight:
+            chi = chi * self.k[None, :] ** kweight
+        return chi
+
+    def chi_sum(self, **params):
+        """Sum of the path contributions; takes the parameters of :meth:`chi`."""
+        return self.chi(**params).sum(axis=0)
+
+
+def plot_chi(engine, kweight=2, show_paths=True, ax=None, **params):
+    """Plot k^kweight chi(k) of each path and of their sum."""
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        fig = plt.figure(figsize=(8, 5))
+        ax = fig.add_subplot(111)
+    chi = engine.chi(kweight=kweight, **params)
+    if show_paths:
+        for index, row in zip(engine.index, chi):
+            ax.plot(engine.k, row, lw=1, alpha=0.7, label=f"path {index}")
+    ax.plot(engine.k, chi.sum(axis=0), 'k-', lw=2, label='sum')
+    ax.set_xlabel(r'k ($\AA^{-1}$)')
+    ax.set_ylabel(rf'k$^{kweight}\chi$(k)' if kweight else r'$\chi$(k)')
+    ax.set_title(r'$\chi$(k)')
+    ax.legend()
+    return ax
@@ -0,0 +1,167 @@
+from functools import lru_cache
+
+import numpy as np
+
+WINDOWS = ('hanning', 'kaiser')
+
+
+@lru_cache(maxsize=64)
+def _uniform_grid(kstep, nk):
+    return np.arange(nk) * kstep
+
+
+@lru_cache(maxsize=64)
+def _r_grid(kstep, nfft):
+    return np.pi / (kstep * nfft) * np.arange(nfft // 2)
+
+
+@lru_cache(maxsize=64)
+def _cached_window(window, kmin, kmax, dk, kstep, nk):
+    k = _uniform_grid(kstep, nk)
+    if window == 'hanning':
+        # sin^2 taper of width dk centred on kmin, cos^2 taper centred on kmax
+        x1, x2, x3, x4 = kmin - dk / 2, kmin + dk / 2, kmax - dk / 2, kmax + dk / 2
+        win = np.zeros(nk)
+        win[(k >= x2) & (k <= x3)] = 1.0
+        if dk > 0:
+            up = (k >= x1) & (k < x2)
+            win[up] = np.sin(np.pi / 2 * (k[up] - x1) / (x2 - x1)) ** 2
+            down = (k > x3) & (k <= x4)
+            win[down] = np.cos(np.pi / 2 * (k[down] - x3) / (x4 - x3)) ** 2
+    elif window == 'kaiser':
+        # Kaiser-Bessel over [kmin, kmax] with dk as the shape parameter beta
+        center, half = (kmax + kmin) / 2, (kmax - kmin) / 2
+        arg = 1.0 - ((k - center) / half) ** 2
+        win = np.where(arg > 0, np.i0(dk * np.sqrt(np.clip(arg, 0, None))) / np.i0(dk), 0.0)
+    else:
+        raise ValueError(f"Unknown window {window!r}; expected one of {WINDOWS}")
+    win.flags.writeable = False
+    return win
+
+
+def ftwindow(window='hanning', kmin=2.0, kmax=12.0, dk=1.0, kstep=0.05, nk=None):
+    """
+    k-space window on the uniform grid ``kstep * arange(nk)``.
+
+    Windows are cached by their parameters and returned read-only, so
+    repeated transforms with the same settings share one array.
+    """
+    if nk is None:
+        nk = int(round((kmax + dk) / kstep)) + 2
+    return _cached_window(window, float(kmin), float(kmax), float(dk), float(kstep), int(nk))
+
+
+class ChiR:
+    """
+    Result of a batched Fourier transform.
+
+    Attributes:
+    -----------
+    r : ndarray
+        R grid in Angstrom
+    chir : ndarray, complex, shape (n_signals, nr)
+        chi(R) of each input signal
+    """
+
+    def __init__(self, r, chir):
+        self.r = r
+        self.chir = chir
+
+    @property
+    def mag(self):
+        return np.abs(self.chir)
+
+    @property
+    def real(self):
+        return self.chir.real
+
+    @property
+    def imag(self):
+        return self.chir.imag
+
+    @property
+    def total(self):
+        """Complex chi(R) of the summed signals (the transform is linear)."""
+        return self.chir.sum(axis=0)
+
+    @property
+    def total_mag(self):
+        return np.abs(self.total)
+
+
+def xftf(k, chi, kmin=2.0, kmax=12.0, dk=1.0, window='hanning', kweight=2,
+         kstep=0.05, nfft=2048, rmax=10.0):
+    """
+    Forward Fourier transform chi(k) -> chi(R) of many signals at once.
+
+    Every signal is put on the uniform grid ``kstep * arange(nk)`` (zero
+    padded to ``nfft``), multiplied by k^kweight and the window, and all
+    rows are transformed by a single ``numpy.fft.fft`` call, with the
+    normalisation kstep / sqrt(pi).
+
+    Parameters:
+    -----------
+    k : array_like, shape (nk_in,)
+        k grid of the input signals in 1/Angstrom
+    chi : array_like, shape (n_signals, nk_in) or (nk_in,)
+        chi(k) signals (not k-weighted), e.g. ``ChiEngine.chi()``
+    kmin, kmax : float, optional
+        Window range in 1/Angstrom (default: 2 to 12)
+    dk : float, optional
+        Taper width for 'hanning', shape parameter beta for 'kaiser'
+        (default: 1.0)
+    window : str, optional
+        'hanning' or 'kaiser' (default: 'hanning')
+    kweight : int, optional
+        k-weight applied before the transform (default: 2)
+    kstep : float, optional
+        Uniform k step in 1/Angstrom (default: 0.05)
+    nfft : int, optional
+        FFT length after zero padding (default: 2048)
+    rmax : float, optional
+        Largest R kept in the result (default: 10.0)
+
+    Returns:
+    --------
+    ChiR
+    """
+    k = np.asarray(k, dtype=np.float64)
+    chi = np.atleast_2d(np.asarray(chi, dtype=np.float64))
+    nk = min(int(round(k[-1] / kstep)) + 1, nfft)
+    grid = _uniform_grid(float(kstep), nk)
+
+    if len(k) == nk and np.allclose(k, grid):
+        signal = chi
+    else:
+        # Linear interpolation of every row onto the uniform grid in one pass
+        i = np.clip(np.searchsorted(k, grid) - 1, 0, len(k) - 2)
+        w = np.clip((grid - k[i]) / (k[i + 1] - k[i]), 0.0, 1.0)
+        signal = (1.0 - w) * chi[:, i] + w * chi[:, i + 1]
+
+    weight = ftwindow(window, kmin, kmax, dk, kstep, nk) * grid ** kweight
+    padded = np.zeros((len(signal), nfft))
+    padded[:, :nk] = signal * weight
+    chir = np.fft.fft(padded, axis=1)[:, :nfft // 2] * (kstep / np.sqrt(np.pi))
+
+    r = _r_grid(float(kstep), int(nfft))
+    keep = r <= rmax
+    return ChiR(r[keep], chir[:, keep])
+
+
+def plot_chir(result, labels=None, ax=None, show_paths=True):
+    """Plot |chi(R)| of each signal and of their sum."""
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        fig = plt.figure(figsize=(8, 5))
+        ax = fig.add_subplot(111)
+    if show_paths:
+        labels = labels if labels is not None else [f"path {i + 1}" for i in range(len(result.chir))]
+        for label, row in zip(labels, result.mag):
+            ax.plot(result.r, row, lw=1, alpha=0.7, label=label)
+    ax.plot(result.r, result.total_mag, 'k-', lw=2, label='sum')
+    ax.set_xlabel(r'R ($\AA$)')
+    ax.set_ylabel(r'|$\chi$(R)|')
+    ax.set_title(r'$\chi$(R)')
+    ax.legend()
+    return ax
@@ -1,36 +1,80 @@
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.lines import Line2D
 from mpl_toolkits.mplot3d import Axes3D
-import re
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 import sys
-from io import StringIO
 
-# Define a color map for common elements
-element_colors = {
-    'Fe': 'orange',
-    'O': 'red',
-    'Si': 'orange',
-    'C': 'black',
-    'H': 'white',
-    'N': 'blue',
-    'P': 'purple',
-    'S': 'yellow',
-    'default': 'gray'
-}
+from feff_io import read_feff_inp
+from view_data import element_colors, get_element_color
 
-def get_element_color(element):
-    """Get color for an element, default to gray if not found."""
-    return element_colors.get(element, element_colors['default'])
+def depth_alpha(values, min_alpha=0.1):
+    """
+    Map coordinates onto a depth-cue alpha in [min_alpha, 1.0], column-wise.
 
-def find_line_number(pattern, lines):
-    for i, line in enumerate(lines):
-        if re.search(pattern, line):
-            return i
-    return None
+    Columns with zero range (e.g. a planar layer) get alpha 1.0 instead of
+    dividing by zero.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.shape[0] == 0:
+        return np.ones_like(values)
+    vmin = values.min(axis=0)
+    vrange = values.max(axis=0) - vmin
+    scale = np.where(vrange > 0, vrange, 1.0)
+    alphas = (values - vmin) / scale * (1.0 - min_alpha) + min_alpha
+    return np.where(vrange > 0, alphas, 1.0)
+
+def distance_rank_sample(distances, budget):
+    """
+    Indices of at most ``budget`` points, thinning the distant ones.
+
+    The nearest half of the budget is kept in full; the remaining points
+    are taken at an even stride in order of distance, so every outer shell
+    is thinned by about the same factor. A budget below 1 is taken as 1.
+    """
+    budget = max(int(budget), 1)
+    order = np.argsort(distances, kind='stable')
+    if len(order) <= budget:
+        return np.sort(order)
+    near = budget // 2
+    far = order[near:]
+    step = int(np.ceil(len(far) / max(budget - near, 1)))
+    return np.sort(np.concatenate((order[:near], far[::step])))
+
+def front_per_bin(points, depth, budget):
+    """
+    Indices of the front-most point (largest ``depth``) in each cell of a grid.
+
+    The 2D ``points`` are binned on a square grid of about ``budget`` cells
+    over their bounding box, so at most ``budget`` indices are returned. A
+    budget below 1 is taken as 1.
+    """
+    budget = max(int(budget), 1)
+    if len(points) <= budget:
+        return np.arange(len(points))
+    side = max(int(np.sqrt(budget)), 1)
+    lo = points.min(axis=0)
+    span = np.where(np.ptp(points, axis=0) > 0, np.ptp(points, axis=0), 1.0)
+    cells = np.minimum(((points - lo) / span * side).astype(np.int64), side - 1)
+    cell = cells[:, 0] * side + cells[:, 1]
+    # Sort by cell, front-most first within a cell, and keep the first of each
+    order = np.lexsort((-depth, cell))
+    _, first = np.unique(cell[order], return_index=True)
+    return np.sort(order[first])
+
+def element_rgba(color, alphas):
+    """Build an (n, 4) RGBA array for a single colour with per-point alpha."""
+    rgba = np.empty((len(alphas), 4))
+    rgba[:, :3] = to_rgba(color)[:3]
+    rgba[:, 3] = alphas
+    return rgba
 
 class CrystalViewer:
-    def __init__(self, inp_file, dot_size=100, show_labels=False):
+    def __init__(self, inp_file, dot_size=100, show_labels=False, structure=None,
+                 show_bonds=False, bond_tolerance=0.45, lod_atoms=10000, max_labels=300,
+                 max_3d_atoms=5000, max_2d_atoms=10000):
         """
         Initialize CrystalViewer with customizable parameters.
         
@@ -42,55 +86,98 @@ class CrystalViewer:
             Size of the scatter points (default: 100)
         show_labels : bool, optional
             Whether to show atom labels (default: True)
+        structure : Structure, optional
+            Already parsed atoms of inp_file (e.g. from the parse cache);
+            the file is not read again when given
+        show_bonds : bool, optional
+            Draw bonds between atoms closer than their covalent radii plus
+            bond_tolerance (default: False)
+        bond_tolerance : float, optional
+            Slack added to the covalent radius sum in Angstrom (default: 0.45)
+        lod_atoms : int or None, optional
+            Level of detail: above this many atoms the scatter and bond layers
+            are rasterised (axes, text and path overlays stay vector), labels
+            are thinned to max_labels and the 3D view is subsampled to
+            max_3d_atoms. None turns it off (default: 10000)
+        max_labels : int, optional
+            Labels kept in level-of-detail mode, on the atoms nearest the
+            absorber (default: 300)
+        max_3d_atoms : int, optional
+            Atoms drawn in the 3D view in level-of-detail mode; the nearest
+            half are all kept and distant shells are thinned (default: 5000)
+        max_2d_atoms : int, optional
+            Atoms drawn in each 2D projection in level-of-detail mode; the
+            projection is binned on a grid of about this many cells and only
+            the front-most atom of each cell is drawn (default: 10000)
         """
         self.inp_file = inp_file
-        self.atoms = self._parse_inp_file()
+        self.atoms = structure if structure is not None else self._parse_inp_file()
         self.dot_size = dot_size
         self.show_labels = show_labels
+        self.show_bonds = show_bonds
+        self.bond_tolerance = bond_tolerance
+        self.lod_atoms = lod_atoms
+        self.max_labels = max_labels
+        self.max_3d_atoms = max_3d_atoms
+        self.max_2d_atoms = max_2d_atoms
+        self._lod_masks = None
+        # Element entries of the legend, set by plot_all_views
+        self.legend_handles = []
         
     def _parse_inp_file(self):
         """Parse the FEFF inp file and extract atom coordinates."""
-        atoms = []
-        with open(self.inp_file, 'r') as f:
-            lines = f.readlines()
+        return read_feff_inp(self.inp_file)
 
-            # Find the ATOMS section
-        atoms_start_ln = find_line_number("ATOMS", lines) +1
-        if atoms_start_ln is None:
-                raise ValueError("Could not find ATOMS section in inp file")
-        else:
-            print(f"Found ATOMS section starting at line {atoms_start_ln}")
-        
-        atoms_end_ln = find_line_number("END", lines[atoms_start_ln:]) -1
-        if atoms_end_ln is None:
-            raise ValueError("Could not find END ATOMS section in inp file")
-        else:
-            atoms_end_ln += atoms_start_ln
-            print(f"Found END ATOMS section at line {atoms_end_ln}")
-        
-        lines_model = lines[atoms_start_ln:atoms_end_ln]
+    def _element_arrays(self):
+        """Yield (element, coords, labels) for each element of the structure."""
+        for element, idx in self.atoms.iter_elements():
+            yield element, self.atoms.coords[idx], self.atoms.labels_of(idx)
+
+    @property
+    def level_of_detail(self):
+        """Whether the structure is large enough for the level-of-detail mode."""
+        return self.lod_atoms is not None and len(self.atoms) > self.lod_atoms
 
-        # Build the dataframe containing atom coordinates
-        for i in range(len(lines_model)):    #fix the lines
-            lines_model[i] = lines_model[i].replace("*", "")
-            lines_model[i] = lines_model[i].replace("\n", "")
-        header = lines_model[0].split()  # Get the header
+    def lod_masks(self):
+        """
+        Per-atom masks of the atoms drawn in each view and of the labelled atoms.
 
-        df = pd.DataFrame(data=[line.split() for line in lines_model[1:]], columns=header)
+        All are True unless :attr:`level_of_detail` is on.
 
-        # Convert the dataframe to a list of dictionaries with float coordinates
-        for index, row in df.iterrows():
-            atoms.append({
-                'element': row['tag'],
-                'label': row['site_info'],
-                'x': float(row['x']),
-                'y': float(row['y']),
-                'z': float(row['z'])   
-            })
-        return atoms
+        Returns:
+        --------
+        in_3d, labelled : ndarray of bool, shape (n,)
+        in_2d : ndarray of bool, shape (n, 3)
+            Atoms drawn in the XY, XZ and YZ projections
+        """
+        if self._lod_masks is None:
+            n = len(self.atoms)
+            in_3d = np.ones(n, dtype=bool)
+            labelled = np.ones(n, dtype=bool)
+            in_2d = np.ones((n, 3), dtype=bool)
+            if self.level_of_detail:
+                center = self.atoms.coords[self.atoms.absorber_index()]
+                dist = np.linalg.norm(self.atoms.coords - center, axis=1)
+                in_3d[:] = False
+                in_3d[distance_rank_sample(dist, self.max_3d_atoms)] = True
+                labelled[:] = False
+                labelled[np.argsort(dist, kind='stable')[:self.max_labels]] = True
+                coords = self.atoms.coords
+                for k, (h, v, d) in enumerate(((0, 1, 2), (0, 2, 1), (1, 2, 0))):
+                    in_2d[:, k] = False
+                    in_2d[front_per_bin(coords[:, [h, v]], coords[:, d], self.max_2d_atoms), k] = True
+            self._lod_masks = in_3d, labelled, in_2d
+        return self._lod_masks
 
     def plot_all_views(self, fig=None, ax3d=None, ax_xy=None, ax_xz=None, ax_yz=None):
-        """Plot the crystal structure on the given axes."""
+        """Plot the crystal structure on the given axes.
+
+        Each element is drawn as a single scatter collection per view. The
+        per-point colours carry a depth cue (alpha 0.1-1.0 along the axis
+        perpendicular to the view) computed once per element and shared by
+        the XY/3D (z), XZ (y) and YZ (x) panels. For large structures see
+        ``lod_atoms``.
+        """
         if ax3d is None or fig is None:
             fig = plt.figure(figsize=(12, 8))
             ax_xy = fig.add_subplot(221)
@@ -98,160 +185,83 @@ class CrystalViewer:
             ax_yz = fig.add_subplot(223)
             ax3d = fig.add_subplot(224, projection='3d')
 
-        # Group atoms by element for plotting
-        elements = set(atom['element'] for atom in self.atoms)
-        for element in elements:
-            element_atoms = [atom for atom in self.atoms if atom['element'] == element]
-            x = [atom['x'] for atom in element_atoms]
-            y = [atom['y'] for atom in element_atoms]
-            z = [atom['z'] for atom in element_atoms]
+        # (axis, horizontal column, vertical column, depth column)
+        views = [(ax_xy, 0, 1, 2), (ax_xz, 0, 2, 1), (ax_yz, 1, 2, 0)]
+
+        if self.show_bonds:
+            self.plot_bonds(fig, ax3d, ax_xy, ax_xz, ax_yz)
+
+        rasterized = self.level_of_detail
+        in_3d, labelled, in_2d = self.lod_masks()
+        # Legend entries are proxy artists, so no empty collections are added to the axes
+        self.legend_handles = []
+        for element, idx in self.atoms.iter_elements():
+            xyz = self.atoms.coords[idx]
             color = get_element_color(element)
-            
-            # Calculate alpha based on z position (perpendicular to XY plane)
-            z_range = max(z) - min(z)
-            alphas = [(z_val - min(z)) / z_range * 0.9 + 0.1 for z_val in z]  # Range 0.1-1.0
-            
-            # Create arrays of dot sizes for each point
-            sizes = [self.dot_size] * len(x)
-            
-            # Plot with varying alpha
-            for x_val, y_val, z_val, alpha, size in zip(x, y, z, alphas, sizes):
-                ax3d.scatter(x_val, y_val, z_val,
-                            s=size,  # Use individual size
-                            alpha=alpha,
-                            color=color,
-                            label=element if alpha == alphas[0] else "")  # Only label first point
-            
-            # Add labels
+            self.legend_handles.append(Line2D([], [], marker='o', ls='', color=color,
+                                              markersize=np.sqrt(self.dot_size), label=element))
+            # One RGBA array per depth axis: column k is the cue along axis k
+            alphas = depth_alpha(xyz)
+            rgba = {k: element_rgba(color, alphas[:, k]) for k in range(3)}
+            shown = in_3d[idx]
             if self.show_labels:
-                for atom in element_atoms:
-                    ax3d.text(atom['x'], atom['y'], atom['z'], atom['label'],
-                             color='black', size=10, zorder=1)
-            
-            # Add legend manually since we suppressed labels
-            if element_atoms:
-                ax3d.scatter([], [], [], s=self.dot_size, alpha=1.0, color=color, label=element)
-        
+                text = labelled[idx]
+                text_xyz, labels = xyz[text], self.atoms.labels_of(idx[text])
+                # No 3D labels on atoms left out of the 3D view
+                text_3d = shown[text]
+
+            ax3d.scatter(xyz[shown, 0], xyz[shown, 1], xyz[shown, 2], s=self.dot_size,
+                         c=rgba[2][shown], depthshade=False, rasterized=rasterized)
+            if self.show_labels:
+                for (x, y, z), label in zip(text_xyz[text_3d], np.array(labels)[text_3d]):
+                    ax3d.text(x, y, z, label, color='black', size=10, zorder=1)
+
+            for k, (ax, h, v, d) in enumerate(views):
+                front = in_2d[idx, k]
+                ax.scatter(xyz[front, h], xyz[front, v], s=self.dot_size, c=rgba[d][front],
+                           rasterized=rasterized)
+                if self.show_labels:
+                    for point, label in zip(text_xyz, labels):
+                        ax.text(point[h], point[v], label, color='black', size=10, zorder=1)
+
         ax3d.set_xlabel('X')
         ax3d.set_ylabel('Y')
         ax3d.set_zlabel('Z')
         ax3d.set_title('3D View')
-        ax3d.legend()
-        
-        # XY plane
-        for element in elements:
-            element_atoms = [atom for atom in self.atoms if atom['element'] == element]
-            x = [atom['x'] for atom in element_atoms]
-            y = [atom['y'] for atom in element_atoms]
-            z = [atom['z'] for atom in element_atoms]  # For alpha calculation
-            color = get_element_color(element)
-            
-            # Calculate alpha based on z position (perpendicular to XY plane)
-            z_range = max(z) - min(z)
-            alphas = [(z_val - min(z)) / z_range * 0.9 + 0.1 for z_val in z]  # Range 0.1-1.0
-            
-            # Create arrays of dot sizes for each point
-            sizes = [self.dot_size] * len(x)
-            
-            # Plot with varying alpha
-            for x_val, y_val, alpha, size in zip(x, y, alphas, sizes):
-                ax_xy.scatter(x_val, y_val, 
-                            s=size,  # Use individual size
-                            alpha=alpha,
-                            color=color,
-                            label=element if alpha == alphas[0] else "")  # Only label first point
-            
-            # Add labels
-            if self.show_labels:
-                for atom in element_atoms:
-                    ax_xy.text(atom['x'], atom['y'], atom['label'],
-                             color='black', size=10, zorder=1)
-            
-            # Add legend manually since we suppressed labels
-            if element_atoms:
-                ax_xy.scatter([], [], s=self.dot_size, alpha=1.0, color=color, label=element)
-        
-        ax_xy.set_xlabel('X')
-        ax_xy.set_ylabel('Y')
-        ax_xy.set_title('XY Plane')
-        ax_xy.legend()
-        
-        # XZ plane
-        for element in elements:
-            element_atoms = [atom for atom in self.atoms if atom['element'] == element]
-            x = [atom['x'] for atom in element_atoms]
-            z = [atom['z'] for atom in element_atoms]
-            y = [atom['y'] for atom in element_atoms]  # For alpha calculation
-            color = get_element_color(element)
-            
-            # Calculate alpha based on y position (perpendicular to XZ plane)
-            y_range = max(y) - min(y)
-            alphas = [(y_val - min(y)) / y_range * 0.9 + 0.1 for y_val in y]  # Range 0.1-1.0
-            
-            # Create arrays of dot sizes for each point
-            sizes = [self.dot_size] * len(x)
-            
-            # Plot with varying alpha
-            for x_val, z_val, alpha, size in zip(x, z, alphas, sizes):
-                ax_xz.scatter(x_val, z_val, 
-                            s=size,  # Use individual size
-                            alpha=alpha,
-                            color=color,
-                            label=element if alpha == alphas[0] else "")  # Only label first point
-            
-            # Add labels
-            if self.show_labels:
-                for atom in element_atoms:
-                    ax_xz.text(atom['x'], atom['z'], atom['label'],
-                             color='black', size=10, zorder=1)
-            
-            # Add legend manually since we suppressed labels
-            if element_atoms:
-                ax_xz.scatter([], [], s=self.dot_size, alpha=1.0, color=color, label=element)
-        
-        ax_xz.set_xlabel('X')
-        ax_xz.set_ylabel('Z')
-        ax_xz.set_title('XZ Plane')
-        ax_xz.legend()
-        
-        # YZ plane
-        for element in elements:
-            element_atoms = [atom for atom in self.atoms if atom['element'] == element]
-            y = [atom['y'] for atom in element_atoms]
-            z = [atom['z'] for atom in element_atoms]
-            x = [atom['x'] for atom in element_atoms]  # For alpha calculation
-            color = get_element_color(element)
-            
-            # Calculate alpha based on x position (perpendicular to YZ plane)
-            x_range = max(x) - min(x)
-            alphas = [(x_val - min(x)) / x_range * 0.9 + 0.1 for x_val in x]  # Range 0.1-1.0
-            
-            # Create arrays of dot sizes for each point
-            sizes = [self.dot_size] * len(y)
-            
-            # Plot with varying alpha
-            for y_val, z_val, alpha, size in zip(y, z, alphas, sizes):
-                ax_yz.scatter(y_val, z_val, 
-                            s=size,  # Use individual size
-                            alpha=alpha,
-                            color=color,
-                            label=element if alpha == alphas[0] else "")  # Only label first point
-            
-            # Add labels
-            if self.show_labels:
-                for atom in element_atoms:
-                    ax_yz.text(atom['y'], atom['z'], atom['label'],
-                             color='black', size=10, zorder=1)
-            
-            # Add legend manually since we suppressed labels
-            if element_atoms:
-                ax_yz.scatter([], [], s=self.dot_size, alpha=1.0, color=color, label=element)
-        
-        ax_yz.set_xlabel('Y')
-        ax_yz.set_ylabel('Z')
-        ax_yz.set_title('YZ Plane')
-        ax_yz.legend()
-        
+        ax3d.legend(handles=self.legend_handles)
+
+        for (ax, h, v, _), title in zip(views, ('XY Plane', 'XZ Plane', 'YZ Plane')):
+            ax.set_xlabel('XYZ'[h])
+            ax.set_ylabel('XYZ'[v])
+            ax.set_title(title)
+            ax.legend(handles=self.legend_handles)
+
+        return fig, ax3d, ax_xy, ax_xz, ax_yz
+
+    def plot_bonds(self, fig, ax3d, ax_xy, ax_xz, ax_yz, color='gray', linewidth=1.0):
+        """Draw the bonds of the structure as one line collection per view, behind the atoms."""
+        bonds = self.atoms.bonds(self.bond_tolerance)
+        segments = self.atoms.coords[bonds]
+        style = dict(colors=color, linewidths=linewidth, zorder=0.5, rasterized=self.level_of_detail)
+        in_3d, _, in_2d = self.lod_masks()
+        # Only bonds between atoms drawn in the view
+        shown = in_3d[bonds].all(axis=1) if len(bonds) else np.zeros(0, dtype=bool)
+        ax3d.add_collection3d(Line3DCollection(segments[shown], **style))
+        for k, (ax, h, v) in enumerate(((ax_xy, 0, 1), (ax_xz, 0, 2), (ax_yz, 1, 2))):
+            shown = in_2d[bonds, k].all(axis=1) if len(bonds) else np.zeros(0, dtype=bool)
+            ax.add_collection(LineCollection(segments[shown][:, :, [h, v]], **style),
+                              autolim=False)
+        return fig, ax3d, ax_xy, ax_xz, ax_yz
+
+    def plot_highlights(self, coords, fig, ax3d, ax_xy, ax_xz, ax_yz, label='Path sites'):
+        """Ring the given crystal sites (e.g. matched path atoms) in all four views."""
+        coords = np.asarray(coords, dtype=float).reshape(-1, 3)
+        style = dict(s=self.dot_size * 2, facecolors='none', edgecolors='magenta',
+                     linewidths=2, label=label)
+        ax3d.scatter(coords[:, 0], coords[:, 1], coords[:, 2], depthshade=False, **style)
+        for ax, h, v in ((ax_xy, 0, 1), (ax_xz, 0, 2), (ax_yz, 1, 2)):
+            highlight = ax.scatter(coords[:, h], coords[:, v], **style)
+            ax.legend(handles=self.legend_handles + [highlight])
         return fig, ax3d, ax_xy, ax_xz, ax_yz
 
     def plot_3d(self, ax=None):
@@ -260,27 +270,18 @@ class CrystalViewer:
             fig = plt.figure(figsize=(8, 8))
             ax = fig.add_subplot(111, projection='3d')
         
-        # Group atoms by element for plotting
-        elements = set(atom['element'] for atom in self.atoms)
-        for element in elements:
-            element_atoms = [atom for atom in self.atoms if atom['element'] == element]
-            x = [atom['x'] for atom in element_atoms]
-            y = [atom['y'] for atom in element_atoms]
-            z = [atom['z'] for atom in element_atoms]
-            color = get_element_color(element)
-            
+        for element, xyz, labels in self._element_arrays():
             # Plot with alpha=0.5
-            ax.scatter(x, y, z, 
+            ax.scatter(xyz[:, 0], xyz[:, 1], xyz[:, 2],
                       s=self.dot_size,
                       alpha=0.5,
-                      color=color,
+                      color=get_element_color(element),
                       label=element)
             
             # Add labels
             if self.show_labels:
-                for atom in element_atoms:
-                    ax.text(atom['x'], atom['y'], atom['z'], atom['label'],
-                            color='black', size=10, zorder=1)
+                for (x, y, z), label in zip(xyz, labels):
+                    ax.text(x, y, z, label, color='black', size=10, zorder=1)
             
         ax.set_xlabel('X')
         ax.set_ylabel('Y')
@@ -292,6 +293,7 @@ class CrystalViewer:
 
 def main():
     import argparse
+    from profiling import add_profile_arguments, profiler_from_args
     
     # Create argument parser
     parser = argparse.ArgumentParser(description='Visualize crystal structure from FEFF input file')
@@ -300,14 +302,50 @@ def main():
                        help='Size of the scatter points (default: 100)')
     parser.add_argument('-lbl','--labels', action='store_true',
                        help='Do not show atom labels')
+    parser.add_argument('-b', '--bonds', action='store_true',
+                       help='Draw bonds between neighbouring atoms')
+    parser.add_argument('--bond-tol', type=float, default=0.45,
+                       help='Bond tolerance added to the covalent radius sum in Angstrom '
+                            '(default: 0.45)')
+    parser.add_argument('--lod-atoms', type=int, default=10000,
+                       help='Level of detail above this many atoms: rasterised atoms, thinned '
+                            'labels, subsampled 3D view (default: 10000)')
+    parser.add_argument('--no-lod', action='store_true',
+                       help='Always draw every atom and label as vector artists')
+    parser.add_argument('--max-labels', type=int, default=300,
+                       help='Labels kept in level-of-detail mode (default: 300)')
+    parser.add_argument('--max-3d-atoms', type=int, default=5000,
+                       help='Atoms drawn in 3D in level-of-detail mode (default: 5000)')
+    parser.add_argument('--max-2d-atoms', type=int, default=10000,
+                       help='Atoms drawn per 2D projection in level-of-detail mode, the '
+                            'front-most per grid cell (default: 10000)')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
+    if args.max_labels < 0 or args.max_3d_atoms < 1 or args.max_2d_atoms < 1:
+        parser.error('--max-labels must be >= 0, --max-3d-atoms and --max-2d-atoms >= 1')
+    profiler = profiler_from_args(args)
     
     # Create viewer with specified parameters
+    with profiler.stage('parse inp'):
+        structure = read_feff_inp(args.input_file)
     viewer = CrystalViewer(args.input_file, 
                          dot_size=args.dot_size,
-                         show_labels=args.labels)
-    viewer.plot_all_views()
+                         show_labels=args.labels,
+                         structure=structure,
+                         show_bonds=args.bonds,
+                         bond_tolerance=args.bond_tol,
+                         lod_atoms=None if args.no_lod else args.lod_atoms,
+                         max_labels=args.max_labels,
+                         max_3d_atoms=args.max_3d_atoms,
+                         max_2d_atoms=args.max_2d_atoms)
+    with profiler.stage('build artists'):
+        fig = viewer.plot_all_views()[0]
+    if profiler.enabled:
+        with profiler.stage('draw'):
+            fig.canvas.draw()
+        profiler.count_artists(fig)
+    profiler.finish(args.profile_json)
     # viewer.plot_3d()
 
 if __name__ == '__main__':
@@ -0,0 +1,122 @@
+"""
+Text summary of FEFF inputs and outputs without any plotting stack.
+
+Prints the composition, atom counts per element and coordination shells of
+feff.inp files, and the nleg/reff/degeneracy table of FEFF runs, path files
+or paths.dat files. Only the parsers (numpy) are imported, so it starts fast
+enough for scripted checks over many runs.
+
+Usage:
+    python feff_info.py -i feff.inp -r path/to/feff_run
+    python main.py info -i run*/feff.inp --json
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from feff_io import read_feff_inp, read_feff_path
+from parse_cache import ParseCache
+from path_collection import load_feff_run
+from paths_dat import PathsDat
+
+
+def structure_info(structure, max_shells=10, tolerance=0.05):
+    """Composition, per-element counts and the first shells around the absorber."""
+    counts = {element: int(len(idx)) for element, idx in structure.iter_elements()}
+    absorber = structure.absorber_index()
+    shells = []
+    for radius, idx in structure.shells(absorber, tolerance=tolerance)[:max_shells]:
+        elements, n = np.unique(structure.element_names_of_atoms_at(idx), return_counts=True)
+        shells.append({'r': round(radius, 4), 'n': int(len(idx)),
+                       'elements': {str(e): int(c) for e, c in zip(elements, n)}})
+    return {'atoms': len(structure), 'counts': counts,
+            'composition': {e: round(c / len(structure), 4) for e, c in counts.items()},
+            'absorber': {'index': absorber, 'element': structure.element_of(absorber)},
+            'shells': shells}
+
+
+def paths_info(source):
+    """nleg, reff and degeneracy of every path of a PathCollection or PathsDat."""
+    return [{'path': int(i), 'nleg': int(n), 'reff': float(r), 'degeneracy': float(d)}
+            for i, n, r, d in zip(source.index, source.nleg, source.reff, source.degeneracy)]
+
+
+def format_structure_info(name, info):
+    lines = [f"{name}: {info['atoms']} atoms, absorber {info['absorber']['element']} "
+             f"(#{info['absorber']['index']})",
+             '  element   count  fraction']
+    for element, count in info['counts'].items():
+        lines.append(f"  {element:7s} {count:7d}  {info['composition'][element]:8.4f}")
+    lines.append('  shell       r     n  elements')
+    for k, shell in enumerate(info['shells'], start=1):
+        elements = ' '.join(f"{e}{n}" for e, n in shell['elements'].items())
+        lines.append(f"  {k:5d}  {shell['r']:6.3f}  {shell['n']:4d}  {elements}")
+    return '\n'.join(lines)
+
+
+def format_paths_info(name, paths):
+    lines = [f"{name}: {len(paths)} paths", '  path  nleg      deg      reff']
+    for p in paths:
+        lines.append(f"{p['path']:6d}  {p['nleg']:4d}  {p['degeneracy']:7.3f}  {p['reff']:8.4f}")
+    return '\n'.join(lines)
+
+
+def load_paths(path_file):
+    """Path table of a feffNNNN.dat or paths.dat file."""
+    if os.path.basename(path_file).lower() == 'paths.dat':
+        with PathsDat(path_file) as paths:
+            return paths_info(paths)
+    path = read_feff_path(path_file)
+    return [{'path': path.index, 'nleg': path.nleg, 'reff': path.reff,
+             'degeneracy': path.degeneracy}]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize FEFF input and output files '
+                                                 '(no plotting libraries are loaded)')
+    parser.add_argument('-i', '--inp', nargs='+', default=[],
+                        help='FEFF input file(s): composition, counts per element and shells')
+    parser.add_argument('-p', '--path', nargs='+', default=[],
+                        help='feffNNNN.dat or paths.dat file(s): path table')
+    parser.add_argument('-r', '--run', nargs='+', default=[],
+                        help='FEFF output directory(ies): path table')
+    parser.add_argument('--shells', type=int, default=10,
+                        help='Number of shells around the absorber to list (default: 10)')
+    parser.add_argument('--shell-tol', type=float, default=0.05,
+                        help='Largest distance gap in Angstrom within a shell (default: 0.05)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Worker processes used to parse --run (default: CPU count)')
+    parser.add_argument('--json', action='store_true',
+                        help='Print one JSON document instead of text tables')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Parse the input files without using the parse cache')
+    args = parser.parse_args(argv)
+
+    if not args.inp and not args.path and not args.run:
+        parser.print_help()
+        return
+
+    cache = None if args.no_cache else ParseCache()
+    report = {'structures': {}, 'paths': {}}
+    for inp_file in args.inp:
+        structure = cache.load_structure(inp_file) if cache is not None else read_feff_inp(inp_file)
+        report['structures'][inp_file] = structure_info(structure, args.shells, args.shell_tol)
+    for path_file in args.path:
+        report['paths'][path_file] = load_paths(path_file)
+    for run_dir in args.run:
+        collection = (cache.load_run(run_dir, workers=args.workers) if cache is not None
+                      else load_feff_run(run_dir, workers=args.workers))
+        report['paths'][run_dir] = paths_info(collection)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    blocks = [format_structure_info(name, info) for name, info in report['structures'].items()]
+    blocks += [format_paths_info(name, paths) for name, paths in report['paths'].items()]
+    print('\n\n'.join(blocks))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import os
+import re
+
+import numpy as np
+
+from structure import Structure
+
+# Header names used for the ATOMS columns by different FEFF front ends
+# (FEFF itself, Atoms/Artemis, pymatgen, ...), mapped to canonical names.
+_ATOMS_COLUMN_ALIASES = {
+    'x': 'x', 'y': 'y', 'z': 'z',
+    'ipot': 'ipot', 'pot': 'ipot',
+    'tag': 'tag', 'atom': 'tag', 'element': 'tag', 'elem': 'tag',
+    'distance': 'distance', 'dist': 'distance', 'r': 'distance',
+    'site_info': 'label', 'site': 'label', 'label': 'label',
+}
+_DEFAULT_ATOMS_COLUMNS = ['x', 'y', 'z', 'ipot', 'tag', 'distance', 'label']
+_NUMBER_START = frozenset('+-.0123456789')
+# Element symbols by atomic number (index 0 unused)
+ELEMENT_SYMBOLS = (
+    '', 'H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne', 'Na', 'Mg', 'Al', 'Si', 'P', 'S',
+    'Cl', 'Ar', 'K', 'Ca', 'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn', 'Ga', 'Ge',
+    'As', 'Se', 'Br', 'Kr', 'Rb', 'Sr', 'Y', 'Zr', 'Nb', 'Mo', 'Tc', 'Ru', 'Rh', 'Pd', 'Ag', 'Cd',
+    'In', 'Sn', 'Sb', 'Te', 'I', 'Xe', 'Cs', 'Ba', 'La', 'Ce', 'Pr', 'Nd', 'Pm', 'Sm', 'Eu', 'Gd',
+    'Tb', 'Dy', 'Ho', 'Er', 'Tm', 'Yb', 'Lu', 'Hf', 'Ta', 'W', 'Re', 'Os', 'Ir', 'Pt', 'Au', 'Hg',
+    'Tl', 'Pb', 'Bi', 'Po', 'At', 'Rn', 'Fr', 'Ra', 'Ac', 'Th', 'Pa', 'U', 'Np', 'Pu', 'Am', 'Cm',
+    'Bk', 'Cf', 'Es', 'Fm', 'Md', 'No', 'Lr',
+)
+
+
+def _card(line):
+    """Return the upper-cased card keyword of a feff.inp line, or '' for comments/blanks."""
+    stripped = line.lstrip()
+    if not stripped or stripped[0] in '*#%!':
+        return ''
+    return stripped.split(None, 1)[0].upper()
+
+
+def _atoms_header(line):
+    """Map a commented ATOMS header line onto canonical column names, or None."""
+    names = [_ATOMS_COLUMN_ALIASES.get(t.lower(), t.lower())
+             for t in line.replace('*', ' ').split()]
+    if names[:3] != ['x', 'y', 'z']:
+        return None
+    return names
+
+
+def _column_positions(columns):
+    """Positions of the ipot, tag and label columns (len(columns) if absent)."""
+    missing = len(columns)
+    return tuple(columns.index(c) if c in columns else missing for c in ('ipot', 'tag', 'label'))
+
+
+def read_feff_inp(inp_file):
+    """
+    Read the ATOMS block of a FEFF input file into a Structure.
+
+    The file is streamed once and reading stops at the END card. Lines
+    starting with ``*`` are comments, except for a header of the form
+    ``* x y z ipot tag distance site_info`` which, if present, defines the
+    column order (common aliases such as ``pot``/``atom``/``site`` are
+    recognised). Atoms without a tag column take the tag of their potential
+    from the POTENTIALS block.
+
+    Parameters:
+    -----------
+    inp_file : str
+        Path to the feff.inp file
+
+    Returns:
+    --------
+    Structure
+        Atom coordinates, tags (as elements), site labels and ipot indices
+    """
+    pot_tags = {}
+    i_pot, i_tag, i_label = _column_positions(_DEFAULT_ATOMS_COLUMNS)
+    xyz, ipots, tags, labels = [], [], [], []
+    section = None
+    found_atoms = False
+
+    with open(inp_file, 'r') as f:
+        for line in f:
+            if section == 'ATOMS':
+                # Fast path for the (possibly very long) coordinate list
+                parts = line.split()
+                if not parts:
+                    continue
+                if parts[0][0] == '*':
+                    header = _atoms_header(line)
+                    if header is not None:
+                        i_pot, i_tag, i_label = _column_positions(header)
+                    continue
+                if '*' in line:
+                    parts = line.split('*', 1)[0].split()
+                if len(parts) >= 4 and parts[0][0] in _NUMBER_START:
+                    n = len(parts)
+                    xyz.extend(parts[:3])
+                    ipots.append(parts[i_pot] if i_pot < n else '0')
+                    tags.append(parts[i_tag] if i_tag < n else None)
+                    labels.append(parts[i_label] if i_label < n else None)
+                    continue
+                # END, or another card following the ATOMS list
+                section = None
+
+            card = _card(line)
+            if card == 'ATOMS':
+                section = 'ATOMS'
+                found_atoms = True
+            elif not card:
+                continue
+            elif card == 'POTENTIALS':
+                section = 'POTENTIALS'
+            elif card == 'END':
+                break
+            elif section == 'POTENTIALS':
+                parts = line.split('*', 1)[0].split()
+                if len(parts) >= 2 and parts[0].isdigit() and _is_number(parts[1]):
+                    if len(parts) > 2:
+                        pot_tags[int(parts[0])] = parts[2]
+                    else:
+                        # No tag column: name the potential after its atomic number
+                        z = int(float(parts[1]))
+                        if 0 < z < len(ELEMENT_SYMBOLS):
+                            pot_tags[int(parts[0])] = ELEMENT_SYMBOLS[z]
+                else:
+                    section = None
+
+    if not found_atoms:
+        raise ValueError("Could not find ATOMS section in inp file")
+
+    coords = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+    ipots = np.asarray(ipots, dtype=float).astype(np.int32)
+    tags = [tag if tag is not None else pot_tags.get(int(p), str(p)) for tag, p in zip(tags, ipots)]
+    labels = [label if label is not None else tag for label, tag in zip(labels, tags)]
+    return Structure(coords, tags, labels=labels, pots=ipots)
+
+
+def _is_number(token):
+    try:
+        float(token)
+    except ValueError:
+        return False
+    return True
+
+
+class FeffPath:
+    """
+    A single FEFF scattering path read from a feffNNNN.dat file.
+
+    Attributes:
+    -----------
+    index : int
+        Path number (NNNN)
+    nleg : int
+        Number of legs
+    degeneracy : float
+        Path degeneracy
+    reff : float
+        Effective (half) path length in Angstrom
+    atoms : Structure
+        Absorber followed by the scatterers, with pot and at# columns
+    source : str
+        File the path was read from
+    data : ndarray, shape (nk, 7), or None
+        Scattering table with the columns of FEFF_DATA_COLUMNS, or None
+        when the path was not read from a feffNNNN.dat or the file has no table
+    """
+
+    def __init__(self, index, nleg, degeneracy, reff, atoms, source=None, data=None):
+        self.index = index
+        self.nleg = nleg
+        self.degeneracy = degeneracy
+        self.reff = reff
+        self.atoms = atoms
+        self.source = source
+        self.data = data
+
+    def column(self, name):
+        """One column of the scattering table, by its FEFF_DATA_COLUMNS name."""
+        if self.data is None:
+            raise ValueError(f"Path {self.index} has no scattering data")
+        return self.data[:, FEFF_DATA_COLUMNS.index(name)]
+
+    def __repr__(self):
+        return (f"FeffPath(index={self.index}, nleg={self.nleg}, "
+                f"degeneracy={self.degeneracy:g}, reff={self.reff:.4f})")
+
+
+# Columns of the numeric block of feffNNNN.dat:
+# k real[2*phc] mag[feff] phase[feff] red factor lambda real[p]
+FEFF_DATA_COLUMNS = ('k', 'phc', 'mag', 'phase', 'red_factor', 'lambda', 'p')
+PATH_FILE_RE = re.compile(r'feff(\d+)\.dat$', re.IGNORECASE)
+_COORD_HEADER_RE = re.compile(r'x\s+y\s+z\s+pot\s+')
+_DATA_HEADER_RE = re.compile(r'k\s+real\[2\*phc\]')
+
+
+def read_feff_path(feff_file):
+    """
+    Read the header, path geometry and scattering table of a feffNNNN.dat file.
+
+    Parameters:
+    -----------
+    feff_file : str
+        Path to the feffNNNN.dat file
+
+    Returns:
+    --------
+    FeffPath
+    """
+    index = nleg = None
+    degeneracy = reff = float('nan')
+    coords, elements, pots, numbers = [], [], [], []
+    # Stays None without a table, as for paths loaded from the parse cache
+    data = None
+
+    with open(feff_file, 'r') as f:
+        for line in f:
+            if _COORD_HEADER_RE.search(line):
+                break
+            parts = line.split()
+            if 'nleg, deg, reff' in line:
+                nleg, degeneracy, reff = int(parts[0]), float(parts[1]), float(parts[2])
+            elif parts[:1] == ['Path'] and len(parts) > 1:
+                index = int(parts[1])
+        else:
+            raise ValueError("Could not find coordinates section in FEFF file")
+
+        # Read coordinates until we reach the k-value section
+        for line in f:
+            if not line.strip():
+                continue
+            if _DATA_HEADER_RE.search(line):
+                # The rest of the file is the numeric table
+                rows = [line.split() for line in f]
+                rows = [row for row in rows if len(row) == len(FEFF_DATA_COLUMNS)]
+                if rows:
+                    data = np.array(rows, dtype=np.float64)
+                break
+            parts = line.split()
+            if len(parts) >= 6:  # x, y, z, pot, at#, element
+                coords.append([float(parts[0]), float(parts[1]), float(parts[2])])
+                elements.append(parts[5])  # element is last column
+                pots.append(int(parts[3]))
+                numbers.append(int(parts[4]))
+
+    if index is None:
+        match = PATH_FILE_RE.search(os.path.basename(feff_file))
+        index = int(match.group(1)) if match else 0
+    if nleg is None:
+        nleg = len(coords)
+    atoms = Structure(coords, elements, pots=pots, atom_numbers=numbers)
+    return FeffPath(index, nleg, degeneracy, reff, atoms, source=feff_file, data=data)
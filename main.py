@@ -1,51 +1,428 @@
 import argparse
-from crystal_viewer import CrystalViewer
-from path_viewer import PathViewer
-import matplotlib.pyplot as plt
+import os
+import sys
+import numpy as np
+from path_collection import load_feff_run
+from paths_dat import PathsDat
+from parse_cache import DEFAULT_MAX_BYTES, ParseCache
+from feff_io import read_feff_inp, read_feff_path
+from spatial_index import CellList
+from path_catalog import SORT_KEYS, PathCatalog
+from path_dedup import group_paths
+from chi import ChiEngine
+from chir import WINDOWS, xftf
+from profiling import add_profile_arguments, profiler_from_args
+# matplotlib (and the modules built on it) is imported only once something is
+# plotted, so parsing, `info` and --html runs start without it
 
-def main():
-    parser = argparse.ArgumentParser(description='Visualize crystal structures and paths')
+def match_path_sites(structure, index, path_atoms, tolerance):
+    """Match every path atom onto a crystal site and print the assignment."""
+    coords = np.concatenate([atoms.coords for atoms in path_atoms])
+    sites = index.match(coords, tolerance=tolerance)
+    print("Path atom -> crystal site")
+    for (x, y, z), site in zip(coords, sites):
+        target = (f"{structure.label_names[structure.label_codes[site]]} (#{site})"
+                  if site >= 0 else "no site within tolerance")
+        print(f"  ({x:8.4f}, {y:8.4f}, {z:8.4f}) -> {target}")
+    return np.unique(sites[sites >= 0])
+
+def match_and_crop(structure, path_atoms, args):
+    """Match path atoms onto crystal sites and apply --crop; return (structure, site coords)."""
+    index = CellList(structure.coords)
+    sites = []
+    if path_atoms:
+        sites = structure.coords[match_path_sites(structure, index, path_atoms, args.match_tol)]
+    if args.crop is not None:
+        if args.crop_around == 'path' and path_atoms:
+            centers = np.concatenate([atoms.coords for atoms in path_atoms])
+        else:
+            centers = structure.coords[structure.absorber_index()]
+        structure = structure.subset(index.crop(centers, args.crop))
+    return structure, sites
+
+def catalog_selection(source, args):
+    """
+    Path numbers picked by the catalog filters (--reff-max, --nleg-max,
+    --contains), or None when no filter was given.
+
+    --save-catalog writes the whole catalog. --sort orders the printed table
+    and the filtered selection; without a filter only the table is printed.
+    """
+    filtered = args.reff_max is not None or args.nleg_max is not None or bool(args.contains)
+    if not filtered and args.sort is None and args.save_catalog is None:
+        return None
+    catalog = PathCatalog.from_source(source)
+    if args.save_catalog:
+        catalog.save(args.save_catalog)
+        print(f"Wrote path catalog to {args.save_catalog}")
+    if filtered:
+        catalog = catalog.query(reff_max=args.reff_max, nleg_max=args.nleg_max,
+                                contains=args.contains or None)
+    if args.sort is not None:
+        catalog = catalog.sort(args.sort)
+    if filtered or args.sort is not None:
+        print(catalog.summary())
+    return catalog.index.tolist() if filtered else None
+
+def missing_paths(source, indices):
+    """Print an error for the path numbers not in ``source``; return whether there were any."""
+    missing = [index for index in indices if index not in source]
+    if missing:
+        available = (f"{min(source.index)}-{max(source.index)}" if len(source.index)
+                     else "none")
+        print(f"Error: No path {', '.join(map(str, missing))} (available paths: {available})")
+    return bool(missing)
+
+def crystal_options(args):
+    """Keyword arguments of CrystalViewer / PathRenderer set by the command line."""
+    return dict(dot_size=args.dot_size, show_labels=args.labels, show_bonds=args.bonds,
+                bond_tolerance=args.bond_tol, lod_atoms=None if args.no_lod else args.lod_atoms,
+                max_labels=args.max_labels, max_3d_atoms=args.max_3d_atoms,
+                max_2d_atoms=args.max_2d_atoms)
+
+def draw_figures(profiler):
+    """With profiling enabled, draw every open figure once and count its artists."""
+    if not profiler.enabled:
+        return
+    import matplotlib.pyplot as plt
+    with profiler.stage('draw'):
+        for number in plt.get_fignums():
+            plt.figure(number).canvas.draw()
+    for number in plt.get_fignums():
+        profiler.count_artists(plt.figure(number))
+
+def load_structure(inp_file, cache=None):
+    """Parse a feff.inp, through the parse cache when one is given."""
+    return cache.load_structure(inp_file) if cache is not None else read_feff_inp(inp_file)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'info':
+        # Text summary without any plotting stack
+        from feff_info import main as info_main
+        return info_main(argv[1:])
+    if argv and argv[0] == 'serve':
+        from render_server import main as serve_main
+        return serve_main(argv[1:])
+    
+    parser = argparse.ArgumentParser(
+        description='Visualize crystal structures and paths',
+        epilog='Run "%(prog)s info -h" for a text summary of FEFF files without plotting and '
+               '"%(prog)s serve -h" for the local render server')
     parser.add_argument('-i', '--inp', help='Path to the FEFF input file')
-    parser.add_argument('-p', '--path', help='Path to the FEFF path file')
+    parser.add_argument('-p', '--path', help='Path to the FEFF path file (feffNNNN.dat or paths.dat)')
+    parser.add_argument('-r', '--run', help='FEFF output directory; loads every feffNNNN.dat in it')
+    parser.add_argument('-n', '--path-index', type=int, nargs='+', default=[],
+                       help='Path numbers from --run or a paths.dat to plot '
+                            '(default: print the path table only)')
+    parser.add_argument('--reff-max', type=float, default=None,
+                       help='Select the paths of --run or a paths.dat with reff up to this '
+                            'value (Angstrom) when -n is not given')
+    parser.add_argument('--nleg-max', type=int, default=None,
+                       help='Select the paths with at most this many legs')
+    parser.add_argument('--contains', nargs='+', default=[], metavar='ELEMENT',
+                       help='Select the paths whose scatterers include all these elements')
+    parser.add_argument('--sort', choices=SORT_KEYS, default=None,
+                       help='Order of the selected paths')
+    parser.add_argument('--save-catalog', default=None, metavar='FILE',
+                       help='Write the path catalog (reff, nleg, degeneracy, leg lengths, '
+                            'angles, elements, amp ratio) to a .npz or .parquet file')
+    parser.add_argument('--dedup', action='store_true',
+                       help='Merge the selected paths that differ only by rotation, mirror or '
+                            'reversal; one path per group is drawn with the summed degeneracy')
+    parser.add_argument('--dedup-tol', type=float, default=0.01,
+                       help='Distance tolerance in Angstrom for --dedup (default: 0.01)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                       help='Worker processes used to parse --run and to render with '
+                            '--output-dir (default: CPU count)')
     parser.add_argument('-ds', '--dot-size', type=int, default=100,
                        help='Size of the scatter points (default: 100)')
     parser.add_argument('-l', '--labels', action='store_true',
                        help='Show atom labels')
+    parser.add_argument('-b', '--bonds', action='store_true',
+                       help='Draw bonds between neighbouring crystal atoms')
+    parser.add_argument('--bond-tol', type=float, default=0.45,
+                       help='Bond tolerance added to the covalent radius sum in Angstrom '
+                            '(default: 0.45)')
+    parser.add_argument('--lod-atoms', type=int, default=10000,
+                       help='Level of detail above this many crystal atoms: rasterised atoms '
+                            '(axes and paths stay vector), thinned labels, subsampled 3D view; '
+                            'not used by --series (default: 10000)')
+    parser.add_argument('--no-lod', action='store_true',
+                       help='Always draw every atom and label as vector artists')
+    parser.add_argument('--max-labels', type=int, default=300,
+                       help='Labels kept in level-of-detail mode, nearest the absorber first '
+                            '(default: 300)')
+    parser.add_argument('--max-3d-atoms', type=int, default=5000,
+                       help='Atoms drawn in the 3D view in level-of-detail mode; distant shells '
+                            'are thinned (default: 5000)')
+    parser.add_argument('--max-2d-atoms', type=int, default=10000,
+                       help='Atoms drawn per 2D projection in level-of-detail mode: the '
+                            'front-most atom of each grid cell (default: 10000)')
+    parser.add_argument('--crop', type=float, default=None, metavar='R',
+                       help='Only draw crystal atoms within R Angstrom of the absorber/path')
+    parser.add_argument('--crop-around', choices=('absorber', 'path'), default='absorber',
+                       help='Centre of --crop: the absorber or every selected path atom '
+                            '(default: absorber)')
+    parser.add_argument('--match-tol', type=float, default=0.05,
+                       help='Distance tolerance in Angstrom for matching path atoms to '
+                            'crystal sites (default: 0.05)')
+    parser.add_argument('-o', '--output-dir', default=None,
+                       help='Render each selected path (default: every path) over the crystal '
+                            'to an image file in this directory instead of showing a window')
+    parser.add_argument('-f', '--format', choices=('png', 'svg', 'pdf'), default='png',
+                       help='Image format for --output-dir (default: png)')
+    parser.add_argument('--dpi', type=int, default=100,
+                       help='Resolution of PNG output (default: 100)')
+    parser.add_argument('--browse', action='store_true',
+                       help='Browse the paths of --run or a paths.dat interactively: arrow keys '
+                            'step through paths, 2-9/0 filter by nleg, +/-/* set a reff cutoff')
+    parser.add_argument('--series', default=None, metavar='GLOB',
+                       help='Animate a series of feff.inp files (e.g. "md/snap*/feff.inp", '
+                            'quoted) with fixed axes; needs --animate')
+    parser.add_argument('--animate', default=None, metavar='OUT',
+                       help='Output of --series: a .gif or .mp4 file (mp4 needs ffmpeg) or a '
+                            'directory for PNG frames')
+    parser.add_argument('--fps', type=int, default=10,
+                       help='Frame rate of the --series movie (default: 10)')
+    parser.add_argument('--track-absorber', action='store_true',
+                       help='Centre every --series frame on its absorber (combine with --crop '
+                            'to follow its environment)')
+    parser.add_argument('--html', default=None, metavar='FILE',
+                       help='Write an interactive WebGL (Plotly) 3D view to this self-contained '
+                            'HTML file instead of opening a window (needs plotly)')
+    parser.add_argument('--chi', action='store_true',
+                       help='Also plot k^w chi(k) of the selected paths and their sum')
+    parser.add_argument('-kw', '--kweight', type=int, default=2,
+                       help='k-weight of the chi(k) plot (default: 2)')
+    parser.add_argument('--s02', type=float, default=1.0,
+                       help='S0^2 used for chi(k) (default: 1.0)')
+    parser.add_argument('--sigma2', type=float, default=0.0,
+                       help='Debye-Waller factor sigma^2 in A^2 used for chi(k) (default: 0.0)')
+    parser.add_argument('--de0', type=float, default=0.0,
+                       help='Energy shift dE0 in eV used for chi(k) (default: 0.0)')
+    parser.add_argument('--chir', action='store_true',
+                       help='Also plot |chi(R)| of the selected paths and their sum')
+    parser.add_argument('--kmin', type=float, default=2.0,
+                       help='Lower k of the Fourier transform window (default: 2.0)')
+    parser.add_argument('--kmax', type=float, default=12.0,
+                       help='Upper k of the Fourier transform window (default: 12.0)')
+    parser.add_argument('--dk', type=float, default=1.0,
+                       help='Window taper width (hanning) or beta (kaiser) (default: 1.0)')
+    parser.add_argument('--window', choices=WINDOWS, default='hanning',
+                       help='Fourier transform window (default: hanning)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Parse the input files without using the parse cache')
+    parser.add_argument('--clear-cache', action='store_true',
+                       help='Delete all parse cache entries before running')
+    parser.add_argument('--cache-dir', default=None,
+                       help='Parse cache directory (default: ~/.cache/exafs_path_viewer)')
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2,
+                       help='Parse cache size limit in MB (default: %(default)g)')
+    add_profile_arguments(parser)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    profiler = profiler_from_args(args)
+    try:
+        run(args, parser, profiler)
+    except BaseException:
+        # Still report the stages measured before the error
+        profiler.finish(args.profile_json)
+        raise
+    # Interactive runs have already reported before showing their figures
+    profiler.finish(args.profile_json)
+
+def run(args, parser, profiler):
+    """Load the inputs and draw, render or export them as requested by ``args``."""
+    cache = None if args.no_cache else ParseCache(args.cache_dir,
+                                                  max_bytes=int(args.cache_size * 1024 ** 2))
+    if args.clear_cache:
+        (cache or ParseCache(args.cache_dir)).clear()
+        if not args.inp and not args.path and not args.run:
+            return
+    
+    if args.series:
+        if not args.animate:
+            print("Error: --series needs an output (--animate movie.gif, movie.mp4 or a directory)")
+            return
+        from series_render import output_format, render_series, series_files
+        try:
+            output_format(args.animate)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        files = series_files(args.series)
+        if not files:
+            print(f"Error: No files match --series {args.series!r}")
+            return
+        with profiler.stage('render'):
+            out = render_series(files, args.animate, workers=args.workers,
+                                track_absorber=args.track_absorber, crop=args.crop, fps=args.fps,
+                                cache_dir=args.cache_dir, use_cache=not args.no_cache,
+                                dot_size=args.dot_size, dpi=args.dpi)
+        print(f"Rendered {len(files)} frames to {out}")
+        return
     
-    if not args.inp and not args.path:
-        print("Error: Please provide either an inp file or a path file")
+    if not args.inp and not args.path and not args.run:
+        print("Error: Please provide an inp file, a path file or a FEFF run directory")
         parser.print_help()
         return
+    if args.max_labels < 0 or args.max_3d_atoms < 1 or args.max_2d_atoms < 1:
+        print("Error: --max-labels must be >= 0, --max-3d-atoms and --max-2d-atoms >= 1")
+        return
     
-    # If only inp file is provided, show crystal structure
-    if args.inp and not args.path:
-        viewer = CrystalViewer(args.inp, dot_size=args.dot_size, show_labels=args.labels)
-        ax3d, ax_xy, ax_xz, ax_yz = viewer.plot_all_views()
-        plt.show()
+    selected = []
+    browse_source = None
+    # -o and --html take precedence over --browse
+    browsing = args.browse and not args.output_dir and not args.html
+    if args.path and os.path.basename(args.path).lower() == 'paths.dat':
+        # Only the requested path blocks are parsed
+        with profiler.stage('parse paths'):
+            paths = PathsDat(args.path)
+            picked = catalog_selection(paths, args)
+            if (picked is None and args.sort is None and not args.path_index
+                    and not args.output_dir and not browsing):
+                print(paths.summary())
+            # Batch rendering without -n renders every (catalog-selected) path
+            indices = args.path_index or (picked if picked is not None else
+                                          list(paths) if args.output_dir else [])
+            if missing_paths(paths, indices):
+                paths.close()
+                return
+            for index in indices:
+                selected.append(paths[index])
+        if browsing:
+            # The other paths are only read as they are browsed
+            browse_source = paths
+        else:
+            paths.close()
+    elif args.path:
+        with profiler.stage('parse paths'):
+            selected.append(read_feff_path(args.path))
+    if args.run:
+        with profiler.stage('parse paths'):
+            if cache is not None:
+                collection = cache.load_run(args.run, workers=args.workers)
+            else:
+                collection = load_feff_run(args.run, workers=args.workers)
+        if browse_source is not None:
+            browse_source.close()
+        browse_source = collection
+        picked = catalog_selection(collection, args)
+        if (picked is None and args.sort is None and not args.path_index
+                and not args.output_dir and not browsing):
+            print(collection.summary())
+        indices = args.path_index or (picked if picked is not None else
+                                      collection.index.tolist() if args.output_dir else [])
+        if missing_paths(collection, indices):
+            return
+        for index in indices:
+            selected.append(collection[index])
+    
+    if args.dedup and selected:
+        groups = group_paths(selected, tolerance=args.dedup_tol)
+        print(f"{len(selected)} paths in {len(groups)} geometrically distinct groups")
+        print(groups.summary())
+        # One representative per group, carrying the summed degeneracy
+        selected = groups.representatives()
+    
+    if args.output_dir:
+        if not args.inp:
+            print("Error: Batch rendering (-o) needs the crystal structure (-i)")
+            return
+        with profiler.stage('parse inp'):
+            structure = load_structure(args.inp, cache)
+        from batch_render import render_paths
+        # Draw and save happen in the worker processes
+        with profiler.stage('render'):
+            written = render_paths(structure, selected, args.output_dir, fmt=args.format,
+                                   workers=args.workers, crop=args.crop, dpi=args.dpi,
+                                   **crystal_options(args))
+        print(f"Wrote {len(written)} figures to {args.output_dir}")
         return
     
-    # If only path file is provided, show path viewer
-    if args.path and not args.inp:
-        viewer = PathViewer(args.path)
-        viewer.plot_all_views()
-        plt.show()
+    path_atoms = [path.atoms for path in selected]
+    
+    structure = None
+    sites = []
+    if args.inp:
+        with profiler.stage('parse inp'):
+            structure = load_structure(args.inp, cache)
+        if path_atoms or args.crop is not None:
+            with profiler.stage('match sites'):
+                structure, sites = match_and_crop(structure, path_atoms, args)
+    
+    if args.html:
+        from plotly_export import export_html
+        with profiler.stage('save'):
+            export_html(args.html, structure=structure, paths=selected, dot_size=args.dot_size,
+                        highlight=sites)
+        print(f"Wrote {args.html}")
         return
     
-    # If both inp and path files are provided, show both
-    if args.inp and args.path:
-        # First plot the crystal structure
-        crystal_viewer = CrystalViewer(args.inp, dot_size=args.dot_size, show_labels=args.labels)
-        fig, ax3d, ax_xy, ax_xz, ax_yz = crystal_viewer.plot_all_views()
-        
-       
-        
-        # Now plot the path viewer on top
-        path_viewer = PathViewer(args.path)
-        fig, ax3d, ax_xy, ax_xz, ax_yz = path_viewer.plot_all_views(fig, ax3d, ax_xy, ax_xz, ax_yz)
-        
-    plt.show()
+    if args.browse:
+        if browse_source is None:
+            print("Error: --browse needs a FEFF run (-r) or a paths.dat (-p)")
+            return
+        import matplotlib.pyplot as plt
+        from path_browser import PathBrowser
+        try:
+            with profiler.stage('build artists'):
+                browser = PathBrowser(browse_source, structure=structure, **crystal_options(args))
+            if selected:
+                browser.show_path(selected[0].index)
+            draw_figures(profiler)
+            profiler.finish(args.profile_json)
+            plt.show()
+        finally:
+            if isinstance(browse_source, PathsDat):
+                browse_source.close()
+        return
+    
+    import matplotlib.pyplot as plt
+    from chi import plot_chi
+    from chir import plot_chir
+    from crystal_viewer import CrystalViewer
+    from path_viewer import plot_paths
+    
+    # Plot the crystal structure first, then the paths on top of it
+    axes = None
+    with profiler.stage('build artists'):
+        if structure is not None:
+            crystal_viewer = CrystalViewer(args.inp, structure=structure, **crystal_options(args))
+            axes = crystal_viewer.plot_all_views()
+            if crystal_viewer.level_of_detail:
+                print(f"{len(structure)} atoms: level-of-detail mode (rasterised atoms, "
+                      f"at most {args.max_labels} labels, {args.max_3d_atoms} atoms in 3D and "
+                      f"{args.max_2d_atoms} per projection)")
+            if len(sites):
+                crystal_viewer.plot_highlights(sites, *axes)
+        if path_atoms:
+            # All selected paths share one set of line collections
+            axes = plot_paths(path_atoms, *(axes or ()),
+                              legend_handles=crystal_viewer.legend_handles
+                              if structure is not None else None)
+    
+    if args.chi or args.chir:
+        with_data = [path for path in selected if path.data is not None]
+        if with_data:
+            with profiler.stage('chi'):
+                engine = ChiEngine(with_data)
+                params = dict(s02=args.s02, sigma2=args.sigma2, de0=args.de0)
+                if args.chi:
+                    plot_chi(engine, kweight=args.kweight, **params)
+                if args.chir:
+                    result = xftf(engine.k, engine.chi(**params), kmin=args.kmin, kmax=args.kmax,
+                                  dk=args.dk, window=args.window, kweight=args.kweight)
+                    plot_chir(result, labels=[f"path {i}" for i in engine.index])
+            axes = axes or ()
+        else:
+            print("No selected path has scattering data (feffNNNN.dat) for chi(k)/chi(R)")
+    
+    if axes is not None:
+        draw_figures(profiler)
+        profiler.finish(args.profile_json)
+        plt.show()
 
 if __name__ == '__main__':
     main()
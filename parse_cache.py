@@ -0,0 +1,165 @@
+import hashlib
+import os
+import warnings
+import zipfile
+
+import numpy as np
+
+from feff_io import read_feff_inp
+from path_collection import PathCollection, load_feff_run, run_files
+from structure import Structure
+
+# Bump when the layout of the cached arrays or the parsed content changes
+CACHE_VERSION = 3
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'exafs_path_viewer')
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+# What np.load and from_arrays raise on a truncated, corrupt or outdated entry
+_BAD_ENTRY_ERRORS = (OSError, ValueError, KeyError, IndexError, EOFError, zipfile.BadZipFile)
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed structures and path collections.
+
+    Entries are ``.npz`` files named after a key built from the source
+    file(s). By default the key uses the absolute path, size and mtime of
+    each source; with ``hash_content=True`` it hashes the file contents
+    instead, which survives copies and touches at the cost of reading the
+    files. Reading an entry marks it as recently used, and after each write
+    the least recently used entries are evicted until the cache fits in
+    ``max_bytes``. Unreadable entries are deleted and parsed again; when
+    the directory cannot be written the parsed result is returned uncached
+    with a warning.
+
+    Parameters:
+    -----------
+    directory : str, optional
+        Cache directory (default: $EXAFS_VIEWER_CACHE_DIR or
+        ~/.cache/exafs_path_viewer)
+    max_bytes : int, optional
+        Size bound of the cache directory (default: 512 MB)
+    hash_content : bool, optional
+        Key entries on file content instead of mtime+size (default: False)
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, hash_content=False):
+        self.directory = directory or os.environ.get('EXAFS_VIEWER_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.hash_content = hash_content
+
+    def _key(self, kind, files):
+        digest = hashlib.sha1(f"{kind}:{CACHE_VERSION}".encode())
+        for name in files:
+            digest.update(os.path.abspath(name).encode())
+            if self.hash_content:
+                with open(name, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+            else:
+                stat = os.stat(name)
+                digest.update(f":{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return os.path.join(self.directory, f"{kind}-{digest.hexdigest()}.npz")
+
+    def _load(self, entry, build):
+        """Rebuild an object from an entry with ``build(arrays)``; None on a miss."""
+        if not os.path.isfile(entry):
+            return None
+        try:
+            with np.load(entry, allow_pickle=False) as data:
+                loaded = build({key: data[key] for key in data.files})
+        except _BAD_ENTRY_ERRORS:
+            # Truncated or corrupt: drop it so that it is written again
+            _remove(entry)
+            return None
+        try:
+            # Mark as recently used for the LRU eviction
+            os.utime(entry)
+        except OSError:
+            pass
+        return loaded
+
+    def _store(self, entry, arrays):
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, entry)
+        except OSError as err:
+            warnings.warn(f"Could not write to the parse cache {self.directory}: {err}",
+                          stacklevel=3)
+            return
+        finally:
+            _remove(tmp)
+        self.evict()
+
+    def load_structure(self, inp_file):
+        """Return the Structure of a feff.inp, parsing it only on a cache miss."""
+        entry = self._key('inp', [inp_file])
+        structure = self._load(entry, Structure.from_arrays)
+        if structure is not None:
+            return structure
+        structure = read_feff_inp(inp_file)
+        self._store(entry, structure.to_arrays())
+        return structure
+
+    def load_run(self, directory, workers=None):
+        """Return the PathCollection of a FEFF run, parsing it only on a cache miss."""
+        entry = self._key('run', run_files(directory))
+        collection = self._load(entry, PathCollection.from_arrays)
+        if collection is not None:
+            return collection
+        collection = load_feff_run(directory, workers=workers)
+        self._store(entry, collection.to_arrays())
+        return collection
+
+    def entries(self):
+        """
+        Return (mtime, size, path) of every cache entry, least recently used first.
+
+        Partly written ``.tmp`` files count as entries too, so that ones left
+        behind by a killed process are evicted eventually.
+        """
+        found = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(('.npz', '.tmp')):
+                        continue
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            found.append((stat.st_mtime, stat.st_size, entry.path))
+                    except FileNotFoundError:
+                        # Removed meanwhile, e.g. by another process evicting
+                        continue
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        return sorted(found)
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+    def clear(self):
+        """Delete every cache entry."""
+        for _, _, path in self.entries():
+            _remove(path)
+
+
+def _remove(path):
+    """Delete a file if it (still) exists; other processes may share the cache."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as err:
+        warnings.warn(f"Could not remove {path}: {err}")
@@ -0,0 +1,262 @@
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import key_press_handler
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+from crystal_viewer import CrystalViewer, get_element_color
+from path_viewer import LEG_CLASSES, path_leg_segments, radial_segments
+
+
+class PathBrowser:
+    """
+    Step through many paths on a crystal that is drawn only once.
+
+    The path overlay is a fixed set of animated artists (one scatter and one
+    line collection per leg class per view) whose data is replaced in place
+    with ``set_offsets``/``set_segments`` when the current path changes. The
+    views are then blitted from a cached background, so switching paths
+    never redraws the crystal. The background is recaptured whenever
+    matplotlib does a full draw (resize, 3D rotation, zoom).
+
+    Keys:
+        right / down    next path
+        left / up       previous path
+        2 ... 9         only paths with that many legs
+        0               all leg counts
+        + / -           raise / lower the reff cutoff by 0.5 Angstrom
+        *               remove the reff cutoff
+
+    Parameters:
+    -----------
+    paths : PathCollection or PathsDat
+        Any path source with ``index``, ``nleg``, ``reff`` and ``degeneracy``
+        arrays and path lookup by number; paths of a PathsDat are only read
+        when shown
+    structure : Structure, optional
+        Crystal atoms drawn once as the background
+    dot_size : int, optional
+        Size of the crystal scatter points (default: 100)
+    **viewer_options
+        Further CrystalViewer options for the crystal (show_labels,
+        show_bonds, bond_tolerance, lod_atoms, max_labels, max_3d_atoms,
+        max_2d_atoms)
+    """
+
+    def __init__(self, paths, structure=None, dot_size=100, **viewer_options):
+        self.paths = paths
+        self.nleg_filter = None
+        self.reff_max = None
+        self.last_update_ms = None
+
+        if structure is not None:
+            viewer = CrystalViewer(None, dot_size=dot_size, structure=structure, **viewer_options)
+            self.fig, self.ax3d, self.ax_xy, self.ax_xz, self.ax_yz = viewer.plot_all_views()
+            element_handles = viewer.legend_handles
+        else:
+            element_handles = []
+            self.fig = plt.figure(figsize=(12, 8))
+            self.ax_xy = self.fig.add_subplot(221)
+            self.ax_xz = self.fig.add_subplot(222)
+            self.ax_yz = self.fig.add_subplot(223)
+            self.ax3d = self.fig.add_subplot(224, projection='3d')
+            self._fit_limits()
+        self.views = ((self.ax_xy, 0, 1), (self.ax_xz, 0, 2), (self.ax_yz, 1, 2))
+        for ax in self.axes:
+            ax.set_autoscale_on(False)
+
+        self._build_overlay(element_handles)
+        self._background = None
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        self.fig.canvas.mpl_connect('key_press_event', self._on_key)
+        # Keep the arrow keys for navigation instead of view history, in this figure only
+        manager = self.fig.canvas.manager
+        if getattr(manager, 'key_press_handler_id', None) is not None:
+            self.fig.canvas.mpl_disconnect(manager.key_press_handler_id)
+            manager.key_press_handler_id = self.fig.canvas.mpl_connect('key_press_event',
+                                                                       self._default_keys)
+
+        self.selection = self._select()
+        self.position = 0
+        self._update()
+
+    @property
+    def axes(self):
+        return (self.ax3d, self.ax_xy, self.ax_xz, self.ax_yz)
+
+    def _fit_limits(self):
+        """Without a crystal, size the views to hold every path of the source."""
+        extent = max(float(np.nanmax(self.paths.reff)) * 1.2, 1.0)
+        for ax in (self.ax_xy, self.ax_xz, self.ax_yz):
+            ax.set_xlim(-extent, extent)
+            ax.set_ylim(-extent, extent)
+        self.ax3d.set_xlim(-extent, extent)
+        self.ax3d.set_ylim(-extent, extent)
+        self.ax3d.set_zlim(-extent, extent)
+
+    def _build_overlay(self, element_handles):
+        """Create the animated path artists and the legend (crystal elements, then leg classes)."""
+        style = dict(animated=True, edgecolors='k', zorder=5)
+        self.scatter3d = self.ax3d.scatter([], [], [], depthshade=False, **style)
+        self.legs3d = []
+        for _, color in LEG_CLASSES:
+            lines = Line3DCollection([], colors=color, animated=True, zorder=4)
+            # Already 3D; add_collection3d would autoscale on the empty segments
+            self.ax3d.add_collection(lines)
+            self.legs3d.append(lines)
+        self.info = self.ax3d.text2D(0.02, 0.98, '', transform=self.ax3d.transAxes,
+                                     va='top', animated=True)
+
+        self.scatter2d, self.radial2d = [], []
+        for ax, _, _ in self.views:
+            self.scatter2d.append(ax.scatter(np.empty(0), np.empty(0), **style))
+            lines = LineCollection([], colors='k', linestyles='--', animated=True, zorder=4)
+            ax.add_collection(lines)
+            self.radial2d.append(lines)
+
+        handles = list(element_handles)
+        labels = [h.get_label() for h in handles]
+        for name, color in LEG_CLASSES:
+            handles.append(Line2D([], [], color=color))
+            labels.append(name)
+        self.ax3d.legend(handles, labels)
+
+    @property
+    def overlay(self):
+        """(axis, animated artists) pairs, in drawing order."""
+        pairs = [(self.ax3d, [self.scatter3d, *self.legs3d, self.info])]
+        for (ax, _, _), scatter, radial in zip(self.views, self.scatter2d, self.radial2d):
+            pairs.append((ax, [radial, scatter]))
+        return pairs
+
+    def _select(self):
+        keep = np.ones(len(self.paths.index), dtype=bool)
+        if self.nleg_filter is not None:
+            keep &= self.paths.nleg == self.nleg_filter
+        if self.reff_max is not None:
+            keep &= self.paths.reff <= self.reff_max
+        return self.paths.index[keep]
+
+    def set_filter(self, nleg=None, reff_max=None):
+        """Restrict browsing to paths with ``nleg`` legs and reff <= ``reff_max``."""
+        self.nleg_filter = nleg
+        self.reff_max = reff_max
+        current = self.current
+        self.selection = self._select()
+        # Stay on the current path if it survives the filter
+        hits = np.flatnonzero(self.selection == current) if current is not None else []
+        self.position = int(hits[0]) if len(hits) else 0
+        self._update()
+
+    @property
+    def current(self):
+        """Number of the path on display, or None if the filter matches nothing."""
+        return int(self.selection[self.position]) if len(self.selection) else None
+
+    def step(self, offset):
+        """Move ``offset`` paths forward (negative: backward) within the selection."""
+        if len(self.selection):
+            self.position = (self.position + offset) % len(self.selection)
+        self._update()
+
+    def _default_keys(self, event):
+        """Matplotlib's default key bindings without the arrow keys."""
+        keymaps = {keymap: [k for k in plt.rcParams[keymap] if k not in ('left', 'right')]
+                   for keymap in ('keymap.back', 'keymap.forward')}
+        with plt.rc_context(keymaps):
+            key_press_handler(event, self.fig.canvas, getattr(self.fig.canvas, 'toolbar', None))
+
+    def show_path(self, index):
+        """Jump to the path with the given number (clearing filters if needed)."""
+        hits = np.flatnonzero(self.selection == index)
+        if not len(hits):
+            self.nleg_filter = self.reff_max = None
+            self.selection = self._select()
+            hits = np.flatnonzero(self.selection == index)
+        if not len(hits):
+            raise KeyError(f"No path {index}")
+        self.position = int(hits[0])
+        self._update()
+
+    def _update(self):
+        start = time.perf_counter()
+        filters = []
+        if self.nleg_filter is not None:
+            filters.append(f"nleg={self.nleg_filter}")
+        if self.reff_max is not None:
+            filters.append(f"reff<={self.reff_max:g}")
+        filter_text = f" [{', '.join(filters)}]" if filters else ''
+
+        if self.current is None:
+            coords = np.empty((0, 3))
+            colors = []
+            legs = [np.empty((0, 2, 3))] * len(LEG_CLASSES)
+            radial = np.empty((0, 2, 3))
+            self.info.set_text(f"no paths{filter_text}")
+        else:
+            path = self.paths[self.current]
+            atoms = path.atoms
+            coords = atoms.coords
+            colors = [get_element_color(e) for e in atoms.element_names_of_atoms()]
+            legs = path_leg_segments([atoms])
+            radial = radial_segments([atoms])
+            self.info.set_text(
+                f"path {path.index} ({self.position + 1}/{len(self.selection)}){filter_text}\n"
+                f"{'-'.join(atoms.element_names_of_atoms())}  nleg={path.nleg}  "
+                f"reff={path.reff:.4f}  deg={path.degeneracy:g}")
+
+        self.scatter3d._offsets3d = (coords[:, 0], coords[:, 1], coords[:, 2])
+        self.scatter3d.set_facecolors(colors)
+        for lines, segments in zip(self.legs3d, legs):
+            lines.set_segments(segments)
+        for (ax, h, v), scatter, lines in zip(self.views, self.scatter2d, self.radial2d):
+            scatter.set_offsets(coords[:, [h, v]])
+            scatter.set_facecolors(colors)
+            lines.set_segments(radial[:, :, [h, v]])
+
+        self._blit()
+        self.last_update_ms = (time.perf_counter() - start) * 1e3
+
+    def _on_draw(self, event):
+        canvas = self.fig.canvas
+        self._background = [canvas.copy_from_bbox(ax.bbox) for ax in self.axes]
+        self._draw_overlay()
+
+    def _draw_overlay(self):
+        for ax, artists in self.overlay:
+            for artist in artists:
+                if hasattr(artist, 'do_3d_projection'):
+                    artist.do_3d_projection()
+                ax.draw_artist(artist)
+
+    def _blit(self):
+        canvas = self.fig.canvas
+        if self._background is None:
+            # First draw; _on_draw captures the background and draws the overlay
+            canvas.draw()
+            return
+        for background in self._background:
+            canvas.restore_region(background)
+        self._draw_overlay()
+        for ax in self.axes:
+            canvas.blit(ax.bbox)
+        canvas.flush_events()
+
+    def _on_key(self, event):
+        if event.key in ('right', 'down'):
+            self.step(1)
+        elif event.key in ('left', 'up'):
+            self.step(-1)
+        elif event.key in tuple('23456789'):
+            self.set_filter(nleg=int(event.key), reff_max=self.reff_max)
+        elif event.key == '0':
+            self.set_filter(nleg=None, reff_max=self.reff_max)
+        elif event.key in ('+', '-'):
+            base = self.reff_max if self.reff_max is not None else float(np.nanmax(self.paths.reff))
+            delta = 0.5 if event.key == '+' else -0.5
+            self.set_filter(nleg=self.nleg_filter, reff_max=max(base + delta, 0.0))
+        elif event.key == '*':
+            self.set_filter(nleg=self.nleg_filter, reff_max=None)
@@ -0,0 +1,256 @@
+import numpy as np
+
+from path_collection import path_mask
+from structure import _intern
+
+# Per-path columns, shape (n,)
+SCALAR_COLUMNS = ('index', 'nleg', 'reff', 'degeneracy', 'amp_ratio', 'sig2')
+# Per-leg / per-atom columns, shape (n, max_nleg), padded past nleg
+LEG_COLUMNS = ('legs', 'angles', 'elements')
+SORT_KEYS = ('index', 'nleg', 'reff', 'degeneracy', 'amp_ratio', 'sig2', 'max_leg')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet export needs the optional 'pyarrow' package "
+                          "(pip install pyarrow); use a .npz file instead") from None
+    return pyarrow
+
+
+def path_geometry(coords):
+    """
+    Leg lengths and scattering angles of equal-length paths.
+
+    Parameters:
+    -----------
+    coords : ndarray, shape (m, nleg, 3)
+        Atoms of m paths in path order, absorber first
+
+    Returns:
+    --------
+    legs : ndarray, shape (m, nleg)
+        Length of leg k, from atom k to atom k+1 (the last leg returns to the
+        absorber)
+    angles : ndarray, shape (m, nleg)
+        Scattering angle in degrees at atom k between the incoming leg k-1
+        and the outgoing leg k (180 = backscattering, 0 = forward scattering)
+    """
+    vectors = np.roll(coords, -1, axis=1) - coords
+    legs = np.linalg.norm(vectors, axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        unit = vectors / legs[:, :, None]
+        cos = np.einsum('mkj,mkj->mk', np.roll(unit, 1, axis=1), unit)
+    return legs, np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+class PathCatalog:
+    """
+    Columnar table of path properties for fast selection.
+
+    Every path is one row: the scalars ``index``, ``nleg``, ``reff``,
+    ``degeneracy``, ``amp_ratio`` and ``sig2`` (NaN where files.dat is not
+    available) are 1D arrays, and the per-leg ``legs`` (Angstrom),
+    ``angles`` (scattering angle, degrees) and ``elements`` (codes into
+    ``element_names``, absorber first) are (n, max_nleg) arrays padded with
+    NaN / -1 beyond each path's nleg. Filters and sorts are plain NumPy
+    operations on these columns and return new catalogs, so selecting paths
+    never touches the parsed files.
+
+    Parameters:
+    -----------
+    columns : dict
+        Arrays named after SCALAR_COLUMNS and LEG_COLUMNS
+    element_names : list of str
+        Element symbols indexed by the codes in ``columns['elements']``
+
+    Examples:
+    ---------
+    >>> catalog = PathCatalog.from_source(load_feff_run('feff_run'))
+    >>> catalog.query(reff_max=4.0, nleg_max=3, contains='O').sort('reff').index
+    """
+
+    def __init__(self, columns, element_names):
+        for name in SCALAR_COLUMNS + LEG_COLUMNS:
+            setattr(self, name, columns[name])
+        self.element_names = list(element_names)
+
+    @classmethod
+    def from_source(cls, source):
+        """
+        Build the catalog of a PathCollection or PathsDat (all paths are read).
+
+        Geometry is computed per leg count on stacked (m, nleg, 3) arrays.
+        """
+        index = np.asarray(source.index, dtype=np.int64)
+        nleg = np.asarray(source.nleg, dtype=np.int64)
+        n, width = len(index), int(nleg.max()) if len(nleg) else 0
+        paths = [source[int(i)] for i in index]
+
+        element_names, codes = _intern([e for p in paths for e in p.atoms.element_names_of_atoms()])
+        offsets = np.concatenate(([0], np.cumsum([len(p.atoms) for p in paths]))).astype(np.intp)
+        columns = {
+            'index': index, 'nleg': nleg,
+            'reff': np.asarray(source.reff, dtype=np.float64),
+            'degeneracy': np.asarray(source.degeneracy, dtype=np.float64),
+            'amp_ratio': np.asarray(getattr(source, 'amp_ratio', np.full(n, np.nan)), dtype=np.float64),
+            'sig2': np.asarray(getattr(source, 'sig2', np.full(n, np.nan)), dtype=np.float64),
+            'legs': np.full((n, width), np.nan),
+            'angles': np.full((n, width), np.nan),
+            'elements': np.full((n, width), -1, dtype=np.int32),
+        }
+        for count in np.unique(nleg):
+            rows = np.flatnonzero(nleg == count)
+            coords = np.stack([paths[r].atoms.coords for r in rows])
+            legs, angles = path_geometry(coords)
+            columns['legs'][rows, :count] = legs
+            columns['angles'][rows, :count] = angles
+            atom_rows = offsets[rows][:, None] + np.arange(count)
+            columns['elements'][rows, :count] = codes[atom_rows]
+        return cls(columns, element_names)
+
+    @property
+    def columns(self):
+        return {name: getattr(self, name) for name in SCALAR_COLUMNS + LEG_COLUMNS}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        return f"PathCatalog({len(self)} paths)"
+
+    @property
+    def max_leg(self):
+        """Longest leg of each path."""
+        return np.nanmax(self.legs, axis=1, initial=0.0) if len(self) else np.empty(0)
+
+    def element_sequence(self, row):
+        """Element symbols of the path in catalog row ``row``, absorber first."""
+        return [self.element_names[c] for c in self.elements[row] if c >= 0]
+
+    def take(self, rows):
+        """Return a new catalog with the given rows (a mask or row positions)."""
+        return PathCatalog({name: array[rows] for name, array in self.columns.items()},
+                           self.element_names)
+
+    def mask(self, nleg=None, nleg_max=None, reff_min=None, reff_max=None,
+             min_degeneracy=None, min_amp_ratio=None, contains=None, excludes=None,
+             max_leg=None, min_angle=None):
+        """
+        Boolean mask over the catalog rows for the given criteria.
+
+        Parameters:
+        -----------
+        nleg : int or sequence of int, optional
+            Allowed leg counts
+        nleg_max : int, optional
+            Largest leg count
+        reff_min, reff_max : float, optional
+            Half path length range in Angstrom
+        min_degeneracy, min_amp_ratio : float, optional
+            Lower bounds on degeneracy and files.dat amplitude ratio (paths
+            without an amplitude ratio never pass the latter)
+        contains : str or sequence of str, optional
+            Elements that must all occur among the scatterers (the
+            absorber is not counted)
+        excludes : str or sequence of str, optional
+            Elements that must not occur among the scatterers
+        max_leg : float, optional
+            Upper bound on every leg length in Angstrom
+        min_angle : float, optional
+            Paths whose scattering angles at all scatterers are at least this
+            many degrees (e.g. 150 keeps near-collinear focusing paths out)
+        """
+        keep = path_mask(self, nleg=nleg, nleg_max=nleg_max, reff_min=reff_min,
+                         reff_max=reff_max, min_degeneracy=min_degeneracy,
+                         min_amp_ratio=min_amp_ratio)
+        scatterers = self.elements[:, 1:]
+        for element in np.atleast_1d(contains if contains is not None else []):
+            code = self._code(element)
+            keep &= (scatterers == code).any(axis=1) if code is not None else False
+        for element in np.atleast_1d(excludes if excludes is not None else []):
+            code = self._code(element)
+            if code is not None:
+                keep &= ~(scatterers == code).any(axis=1)
+        if max_leg is not None:
+            keep &= self.max_leg <= max_leg
+        if min_angle is not None:
+            angles = np.where(np.isnan(self.angles[:, 1:]), 180.0, self.angles[:, 1:])
+            keep &= (angles >= min_angle).all(axis=1)
+        return keep
+
+    def _code(self, element):
+        try:
+            return self.element_names.index(str(element))
+        except ValueError:
+            return None
+
+    def query(self, **criteria):
+        """Return the catalog of the rows matching the criteria of :meth:`mask`."""
+        return self.take(self.mask(**criteria))
+
+    def sort(self, by='reff', descending=False):
+        """Return the catalog sorted on one of SORT_KEYS (stable, NaN last)."""
+        if by not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key {by!r}; expected one of {SORT_KEYS}")
+        values = getattr(self, by)
+        order = np.argsort(-values if descending else values, kind='stable')
+        return self.take(order)
+
+    def summary(self):
+        """Return a plain-text table of the catalog."""
+        lines = ['  path  nleg      deg      reff  amp ratio  max leg  elements']
+        for row in range(len(self)):
+            lines.append(f"{self.index[row]:6d}  {self.nleg[row]:4d}  {self.degeneracy[row]:7.3f}  "
+                         f"{self.reff[row]:8.4f}  {self.amp_ratio[row]:9.3f}  "
+                         f"{np.nanmax(self.legs[row]):7.3f}  {'-'.join(self.element_sequence(row))}")
+        return '\n'.join(lines)
+
+    def to_arrays(self):
+        """Return the catalog as a dict of NumPy arrays (e.g. for ``np.savez``)."""
+        arrays = dict(self.columns)
+        arrays['element_names'] = np.array(self.element_names, dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a catalog from the output of :meth:`to_arrays`."""
+        return cls({name: arrays[name] for name in SCALAR_COLUMNS + LEG_COLUMNS},
+                   arrays['element_names'].tolist())
+
+    def save(self, out_file):
+        """Write the catalog to ``.npz``, or to ``.parquet`` when pyarrow is installed."""
+        if out_file.lower().endswith('.parquet'):
+            pa = _require_pyarrow()
+            table = {name: getattr(self, name) for name in SCALAR_COLUMNS}
+            for name in ('legs', 'angles'):
+                table[name] = [row[:n].tolist() for row, n in zip(getattr(self, name), self.nleg)]
+            table['elements'] = [self.element_sequence(row) for row in range(len(self))]
+            pa.parquet.write_table(pa.table(table), out_file)
+        else:
+            np.savez_compressed(out_file, **self.to_arrays())
+
+    @classmethod
+    def load(cls, catalog_file):
+        """Read a catalog written by :meth:`save`."""
+        if not catalog_file.lower().endswith('.parquet'):
+            with np.load(catalog_file, allow_pickle=False) as data:
+                return cls.from_arrays({key: data[key] for key in data.files})
+        pa = _require_pyarrow()
+        table = pa.parquet.read_table(catalog_file).to_pydict()
+        columns = {name: np.asarray(table[name]) for name in SCALAR_COLUMNS}
+        nleg = columns['nleg'].astype(np.int64)
+        n, width = len(nleg), int(nleg.max()) if len(nleg) else 0
+        element_names, codes = _intern([e for seq in table['elements'] for e in seq])
+        columns['legs'] = np.full((n, width), np.nan)
+        columns['angles'] = np.full((n, width), np.nan)
+        columns['elements'] = np.full((n, width), -1, dtype=np.int32)
+        start = 0
+        for row, count in enumerate(nleg):
+            columns['legs'][row, :count] = table['legs'][row]
+            columns['angles'][row, :count] = table['angles'][row]
+            columns['elements'][row, :count] = codes[start:start + count]
+            start += count
+        return cls(columns, element_names)
@@ -0,0 +1,280 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from feff_io import FEFF_DATA_COLUMNS, PATH_FILE_RE, FeffPath, read_feff_path
+from structure import Structure
+
+
+def path_mask(table, nleg=None, nleg_max=None, reff_min=None, reff_max=None,
+              min_degeneracy=None, min_amp_ratio=None):
+    """
+    Boolean mask over a table of paths for the usual scalar criteria.
+
+    Shared by PathCollection, PathsDat and PathCatalog so that their
+    selections agree.
+
+    Parameters:
+    -----------
+    table : object
+        Anything with ``nleg``, ``reff`` and ``degeneracy`` arrays, and an
+        ``amp_ratio`` array for ``min_amp_ratio``
+    nleg : int or sequence of int, optional
+        Allowed leg counts
+    nleg_max : int, optional
+        Largest leg count
+    reff_min, reff_max : float, optional
+        Half path length range in Angstrom
+    min_degeneracy, min_amp_ratio : float, optional
+        Lower bounds on degeneracy and files.dat amplitude ratio (paths
+        without an amplitude ratio never pass the latter)
+    """
+    keep = np.ones(len(table.nleg), dtype=bool)
+    if nleg is not None:
+        keep &= np.isin(table.nleg, np.atleast_1d(nleg))
+    if nleg_max is not None:
+        keep &= table.nleg <= nleg_max
+    if reff_min is not None:
+        keep &= table.reff >= reff_min
+    if reff_max is not None:
+        keep &= table.reff <= reff_max
+    if min_degeneracy is not None:
+        keep &= table.degeneracy >= min_degeneracy
+    if min_amp_ratio is not None:
+        amp_ratio = getattr(table, 'amp_ratio', None)
+        if amp_ratio is None:
+            raise ValueError("min_amp_ratio needs the amplitude ratios of files.dat")
+        keep &= amp_ratio >= min_amp_ratio
+    return keep
+
+
+def path_summary(table):
+    """Plain-text table of path number, nleg, degeneracy, reff (and amplitude ratio)."""
+    amp_ratio = getattr(table, 'amp_ratio', None)
+    lines = ['  path  nleg      deg      reff' + ('  amp ratio' if amp_ratio is not None else '')]
+    for k, (i, n, d, r) in enumerate(zip(table.index, table.nleg, table.degeneracy, table.reff)):
+        line = f"{i:6d}  {n:4d}  {d:7.3f}  {r:8.4f}"
+        if amp_ratio is not None:
+            line += f"  {amp_ratio[k]:9.3f}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+class PathCollection:
+    """
+    In-memory set of FEFF paths indexed by path number.
+
+    The per-path scalars are also held as NumPy arrays (``index``, ``nleg``,
+    ``reff``, ``degeneracy``, ``amp_ratio``, ``sig2``) in path-number order so
+    that selections are vectorised.
+
+    Parameters:
+    -----------
+    paths : iterable of FeffPath
+        Parsed paths
+    files_info : dict, optional
+        Per-path entries from files.dat, keyed by path number
+    paths_dat : str, optional
+        Location of the run's paths.dat, if any
+    """
+
+    def __init__(self, paths, files_info=None, paths_dat=None):
+        self.paths = sorted(paths, key=lambda p: p.index)
+        self.files_info = files_info or {}
+        self.paths_dat = paths_dat
+        self.index = np.array([p.index for p in self.paths], dtype=np.int64)
+        self.nleg = np.array([p.nleg for p in self.paths], dtype=np.int64)
+        self.reff = np.array([p.reff for p in self.paths], dtype=np.float64)
+        self.degeneracy = np.array([p.degeneracy for p in self.paths], dtype=np.float64)
+        self.amp_ratio = np.array([self.files_info.get(i, {}).get('amp_ratio', np.nan)
+                                   for i in self.index], dtype=np.float64)
+        self.sig2 = np.array([self.files_info.get(i, {}).get('sig2', np.nan)
+                              for i in self.index], dtype=np.float64)
+        self._position = {int(i): k for k, i in enumerate(self.index)}
+
+    def to_arrays(self):
+        """
+        Return the collection as a dict of NumPy arrays (e.g. for ``np.savez``).
+
+        The atoms and scattering tables of all paths are concatenated and
+        split again with ``atom_offsets`` and ``data_offsets``.
+        """
+        sizes = [len(p.atoms) for p in self.paths]
+        tables = [p.data if p.data is not None else np.empty((0, len(FEFF_DATA_COLUMNS)))
+                  for p in self.paths]
+        atoms = Structure(
+            np.concatenate([p.atoms.coords for p in self.paths]) if self.paths else np.empty((0, 3)),
+            [e for p in self.paths for e in p.atoms.element_names_of_atoms()],
+            pots=np.concatenate([p.atoms.pots for p in self.paths]) if self.paths else [],
+            atom_numbers=np.concatenate([p.atoms.atom_numbers for p in self.paths]) if self.paths else [])
+        info = [self.files_info[i] for i in sorted(self.files_info)]
+        arrays = {
+            'index': self.index, 'nleg': self.nleg, 'reff': self.reff,
+            'degeneracy': self.degeneracy,
+            'source': np.array([p.source or '' for p in self.paths], dtype=str),
+            'atom_offsets': np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+            'data': np.concatenate(tables) if tables else np.empty((0, len(FEFF_DATA_COLUMNS))),
+            'data_offsets': np.concatenate(([0], np.cumsum([len(t) for t in tables]))).astype(np.int64),
+            'paths_dat': np.array(self.paths_dat or ''),
+            'files_index': np.array(sorted(self.files_info), dtype=np.int64),
+        }
+        for key, dtype in (('file', str), ('sig2', float), ('amp_ratio', float),
+                           ('degeneracy', float), ('nleg', np.int64), ('reff', float)):
+            arrays['files_' + key] = np.array([entry[key] for entry in info], dtype=dtype)
+        arrays.update(atoms.to_arrays(prefix='atoms_'))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a PathCollection from the output of :meth:`to_arrays`."""
+        atoms = Structure.from_arrays(arrays, prefix='atoms_')
+        elements = atoms.element_names_of_atoms()
+        offsets = arrays['atom_offsets']
+        data_offsets = arrays['data_offsets']
+        paths = []
+        for k, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+            path_atoms = Structure(atoms.coords[start:stop], elements[start:stop],
+                                   pots=atoms.pots[start:stop],
+                                   atom_numbers=atoms.atom_numbers[start:stop])
+            data = arrays['data'][data_offsets[k]:data_offsets[k + 1]]
+            paths.append(FeffPath(int(arrays['index'][k]), int(arrays['nleg'][k]),
+                                  float(arrays['degeneracy'][k]), float(arrays['reff'][k]),
+                                  path_atoms, source=str(arrays['source'][k]) or None,
+                                  data=data if len(data) else None))
+        files_info = {}
+        for k, i in enumerate(arrays['files_index'].tolist()):
+            files_info[i] = {
+                'file': str(arrays['files_file'][k]),
+                'sig2': float(arrays['files_sig2'][k]),
+                'amp_ratio': float(arrays['files_amp_ratio'][k]),
+                'degeneracy': float(arrays['files_degeneracy'][k]),
+                'nleg': int(arrays['files_nleg'][k]),
+                'reff': float(arrays['files_reff'][k]),
+            }
+        return cls(paths, files_info=files_info, paths_dat=str(arrays['paths_dat']) or None)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __contains__(self, index):
+        return index in self._position
+
+    def __getitem__(self, index):
+        """Return the path with the given path number."""
+        try:
+            return self.paths[self._position[index]]
+        except KeyError:
+            raise KeyError(f"No path {index} in collection") from None
+
+    def __repr__(self):
+        return f"PathCollection({len(self)} paths)"
+
+    def mask(self, **criteria):
+        """Boolean mask over the collection for the criteria of :func:`path_mask`."""
+        return path_mask(self, **criteria)
+
+    def select(self, **criteria):
+        """Path numbers matching the criteria accepted by :meth:`mask`."""
+        return self.index[self.mask(**criteria)].tolist()
+
+    def filter(self, **criteria):
+        """Return the paths matching the criteria accepted by :meth:`mask`."""
+        return [self.paths[k] for k in np.flatnonzero(self.mask(**criteria))]
+
+    def by_nleg(self):
+        """Map each leg count to the path numbers having it."""
+        return {int(n): self.index[self.nleg == n] for n in np.unique(self.nleg)}
+
+    def summary(self):
+        """Return a plain-text table of the paths in the collection."""
+        return path_summary(self)
+
+
+def read_files_dat(files_dat):
+    """
+    Read the path table of a FEFF files.dat.
+
+    Returns:
+    --------
+    dict
+        Path number -> {'file', 'sig2', 'amp_ratio', 'degeneracy', 'nleg', 'reff'}
+    """
+    info = {}
+    with open(files_dat, 'r') as f:
+        for line in f:
+            if 'sig2' in line and 'file' in line:
+                break
+        for line in f:
+            parts = line.split()
+            match = PATH_FILE_RE.search(parts[0]) if parts else None
+            if match is None or len(parts) < 6:
+                continue
+            info[int(match.group(1))] = {
+                'file': parts[0],
+                'sig2': float(parts[1]),
+                'amp_ratio': float(parts[2]),
+                'degeneracy': float(parts[3]),
+                'nleg': int(parts[4]),
+                'reff': float(parts[5]),
+            }
+    return info
+
+
+def find_path_files(directory):
+    """Return the feffNNNN.dat files of a FEFF run directory, sorted by path number."""
+    found = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = PATH_FILE_RE.fullmatch(entry.name)
+            if match and entry.is_file():
+                found.append((int(match.group(1)), entry.path))
+    return [path for _, path in sorted(found)]
+
+
+def run_files(directory):
+    """The feffNNNN.dat files of a FEFF run plus its files.dat and paths.dat, if present."""
+    files = find_path_files(directory)
+    for extra in ('files.dat', 'paths.dat'):
+        if os.path.isfile(os.path.join(directory, extra)):
+            files.append(os.path.join(directory, extra))
+    return files
+
+
+def load_feff_run(directory, workers=None, parallel_threshold=32):
+    """
+    Load every path of a FEFF output directory into a PathCollection.
+
+    The feffNNNN.dat files are parsed in a process pool; files.dat, if
+    present, supplies the amplitude ratios and sigma^2 values.
+
+    Parameters:
+    -----------
+    directory : str
+        FEFF output directory
+    workers : int, optional
+        Number of worker processes (default: CPU count). ``1`` parses serially.
+    parallel_threshold : int, optional
+        Runs with fewer path files are parsed serially, since starting the
+        pool would cost more than it saves (default: 32)
+    """
+    files = find_path_files(directory)
+    if not files:
+        raise ValueError(f"No feffNNNN.dat files found in {directory}")
+
+    if workers == 1 or len(files) < parallel_threshold:
+        paths = [read_feff_path(f) for f in files]
+    else:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(read_feff_path, files, chunksize=chunksize))
+
+    files_dat = os.path.join(directory, 'files.dat')
+    files_info = read_files_dat(files_dat) if os.path.isfile(files_dat) else None
+    paths_dat = os.path.join(directory, 'paths.dat')
+    return PathCollection(paths, files_info=files_info,
+                          paths_dat=paths_dat if os.path.isfile(paths_dat) else None)
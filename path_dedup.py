@@ -0,0 +1,150 @@
+import numpy as np
+
+from feff_io import FeffPath
+from structure import _intern
+
+
+def path_fingerprints(coords, codes, tolerance=0.01):
+    """
+    Rotation-invariant fingerprints of equal-length paths.
+
+    A path is described by its element sequence and the distances between
+    all pairs of its atoms (which fix the leg lengths, scattering angles and
+    dihedrals up to rotation, translation and mirroring), with distances
+    quantised to multiples of ``tolerance``. The time-reversed path (absorber
+    first, scatterers in reverse order) describes the same scattering, so the
+    lexicographically smaller of the two descriptions is used.
+
+    Parameters:
+    -----------
+    coords : ndarray, shape (m, n, 3)
+        Atoms of m paths in path order, absorber first
+    codes : ndarray of int, shape (m, n)
+        Element code of every atom
+    tolerance : float, optional
+        Distance quantum in Angstrom (default: 0.01)
+
+    Returns:
+    --------
+    ndarray of int64, shape (m, k)
+        One fingerprint row per path
+    """
+    m, n = codes.shape
+    upper = np.triu_indices(n, 1)
+    reverse = np.r_[0, np.arange(n - 1, 0, -1)]
+    dist = np.linalg.norm(coords[:, :, None, :] - coords[:, None, :, :], axis=3)
+    forward = np.hstack([codes, np.rint(dist[:, upper[0], upper[1]] / tolerance)]).astype(np.int64)
+    dist_rev = dist[:, reverse][:, :, reverse]
+    backward = np.hstack([codes[:, reverse],
+                          np.rint(dist_rev[:, upper[0], upper[1]] / tolerance)]).astype(np.int64)
+    # Row-wise lexicographic minimum of the two descriptions
+    differ = forward != backward
+    first = differ.argmax(axis=1)
+    rows = np.arange(m)
+    use_backward = differ.any(axis=1) & (backward[rows, first] < forward[rows, first])
+    return np.where(use_backward[:, None], backward, forward)
+
+
+class PathGroups:
+    """
+    Paths grouped by geometric equivalence.
+
+    Attributes:
+    -----------
+    paths : list of FeffPath
+        The grouped paths, in input order
+    group : ndarray of int, shape (n_paths,)
+        Group number of every path
+    members : list of ndarray
+        Positions (into ``paths``) of the paths of each group, in input order
+    degeneracy : ndarray, shape (n_groups,)
+        Summed degeneracy of each group
+    """
+
+    def __init__(self, paths, group):
+        self.paths = paths
+        self.group = group
+        order = np.argsort(group, kind='stable')
+        bounds = np.searchsorted(group[order], np.arange(group.max() + 2 if len(group) else 1))
+        self.members = [order[bounds[g]:bounds[g + 1]] for g in range(len(bounds) - 1)]
+        degeneracy = np.array([p.degeneracy for p in paths], dtype=np.float64)
+        self.degeneracy = np.bincount(group, weights=degeneracy, minlength=len(self.members))
+
+    def __len__(self):
+        return len(self.members)
+
+    def __repr__(self):
+        return f"PathGroups({len(self.paths)} paths in {len(self)} groups)"
+
+    def representatives(self):
+        """
+        One path per group (its first member) carrying the summed degeneracy.
+
+        The returned FeffPath objects are copies; atoms and scattering data
+        are shared with the original paths.
+        """
+        reps = []
+        for members, degeneracy in zip(self.members, self.degeneracy):
+            p = self.paths[members[0]]
+            reps.append(FeffPath(p.index, p.nleg, float(degeneracy), p.reff, p.atoms,
+                                 source=p.source, data=p.data))
+        return reps
+
+    def summary(self):
+        """Return a plain-text table of the groups."""
+        lines = ['  path  nleg      deg      reff  members  merged paths']
+        for members, degeneracy in zip(self.members, self.degeneracy):
+            p = self.paths[members[0]]
+            merged = ' '.join(str(self.paths[k].index) for k in members[1:9])
+            if len(members) > 9:
+                merged += ' ...'
+            lines.append(f"{p.index:6d}  {p.nleg:4d}  {degeneracy:7.3f}  {p.reff:8.4f}  "
+                         f"{len(members):7d}  {merged}")
+        return '\n'.join(lines)
+
+
+def group_paths(paths, tolerance=0.01):
+    """
+    Group geometrically equivalent paths.
+
+    Paths are equivalent when they have the same element sequence and the
+    same inter-atomic distances within ``tolerance``, i.e. they differ only
+    by a rotation, mirror or reversal. Fingerprints are computed on stacked
+    arrays per leg count and grouped with ``np.unique``, so the cost is
+    O(n log n) in the number of paths. Distances are rounded to the nearest
+    multiple of ``tolerance``; two paths that straddle a rounding boundary
+    can end up in separate groups.
+
+    Parameters:
+    -----------
+    paths : sequence of FeffPath
+        Paths to group (e.g. a PathCollection or the selected paths)
+    tolerance : float, optional
+        Distance tolerance in Angstrom (default: 0.01)
+
+    Returns:
+    --------
+    PathGroups
+    """
+    paths = list(paths)
+    _, codes = _intern([e for p in paths for e in p.atoms.element_names_of_atoms()])
+    sizes = np.array([len(p.atoms) for p in paths], dtype=np.intp)
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    group = np.empty(len(paths), dtype=np.int64)
+    next_group = 0
+    for n in np.unique(sizes):
+        rows = np.flatnonzero(sizes == n)
+        coords = np.stack([paths[r].atoms.coords for r in rows])
+        atom_codes = codes[offsets[rows][:, None] + np.arange(n)]
+        keys = path_fingerprints(coords, atom_codes, tolerance)
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        # Number groups by their first member so the output follows input order
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+        group[rows] = rank[inverse.ravel()] + next_group
+        next_group += len(first)
+    # Renumber all groups by first appearance across leg counts
+    _, first = np.unique(group, return_index=True)
+    remap = np.empty(next_group, dtype=np.int64)
+    remap[np.argsort(first, kind='stable')] = np.arange(len(first))
+    return PathGroups(paths, remap[group] if len(group) else group)
@@ -1,188 +1,161 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 from mpl_toolkits.mplot3d import Axes3D
-import re
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 import sys
+
+from feff_io import read_feff_path
+from view_data import (LEG_CLASSES, get_element_color, path_leg_segments, radial_segments,
+                       unique_path_atoms)
+
 class PathViewer:
     def __init__(self, feff_file):
         self.feff_file = feff_file
+        self.path = None
         self.atoms = self._parse_feff_file()
+
+    @classmethod
+    def from_path(cls, path):
+        """Create a viewer for an already parsed FeffPath."""
+        viewer = cls.__new__(cls)
+        viewer.feff_file = path.source
+        viewer.path = path
+        viewer.atoms = path.atoms
+        return viewer
         
     def _parse_feff_file(self):
         """Parse the FEFF path file and extract atom coordinates."""
-        atoms = []
-        with open(self.feff_file, 'r') as f:
-            lines = f.readlines()
-            # Find the coordinates section (starts with line containing 'x y z pot at#')
-            coord_start = None
-            for i, line in enumerate(lines):
-                if re.findall("x\s+y\s+z\s+pot\s+", line):
-                    coord_start = i + 1  # Start reading coordinates from next line
-                    break
-            
-            if coord_start is None:
-                raise ValueError("Could not find coordinates section in FEFF file")
-            
-            # Read coordinates until we reach the k-value section
-            for line in lines[coord_start:]:
-                if not line.strip():
-                    continue
-                if re.findall("k\s+real\[2\*phc\]", line):
-                    break
-                
-                parts = line.split()
-                if len(parts) >= 6:  # x, y, z, pot, at#, element
-                    atom = {
-                        'element': parts[5],  # element is last column
-                        'x': float(parts[0]),
-                        'y': float(parts[1]),
-                        'z': float(parts[2]),
-                        'pot': int(parts[3]),
-                        'at#': int(parts[4])
-                    }
-                    atoms.append(atom)
-        
-        return atoms
+        self.path = read_feff_path(self.feff_file)
+        return self.path.atoms
 
     def plot_2d(self):
         """Create a 2D plot of the atomic structure."""
-        plt.figure(figsize=(8, 8))
-
-        # Plot atoms
-        for atom in self.atoms:
-            plt.scatter(atom['x'], atom['y'], label=atom['element'])
-            plt.text(atom['x'], atom['y'], atom['element'])
-
-        # Plot connections in correct order: Fe-C, C-C, then back to absorber
-        # First, find Fe and C atoms
-        fe_atoms = [a for a in self.atoms if a['element'] == 'Fe']
-        c_atoms = [a for a in self.atoms if a['element'] == 'C']
-
-        # Plot Fe-C connections
-        for fe in fe_atoms:
-            for c in c_atoms:
-                plt.plot([fe['x'], c['x']],
-                         [fe['y'], c['y']],
-                         'r-', label='Fe-C' if 'Fe-C' not in plt.get_legend_handles_labels()[1] else '')
-
-        # Plot C-C connections
-        for i in range(len(c_atoms) - 1):
-            c1 = c_atoms[i]
-            c2 = c_atoms[i + 1]
-            plt.plot([c1['x'], c2['x']],
-                     [c1['y'], c2['y']],
-                     'b-', label='C-C' if 'C-C' not in plt.get_legend_handles_labels()[1] else '')
-
-        # Plot back to absorber (first atom)
-        for c in c_atoms:
-            plt.plot([c['x'], self.atoms[0]['x']],
-                     [c['y'], self.atoms[0]['y']],
-                     'g-', label='Back to Absorber' if 'Back to Absorber' not in plt.get_legend_handles_labels()[1] else '')
-
-        plt.xlabel('X')
-        plt.ylabel('Y')
-        plt.title('2D Atomic Structure')
-        plt.legend()
+        fig = plt.figure(figsize=(8, 8))
+        ax = fig.add_subplot(111)
+
+        coords, elements = unique_path_atoms([self.atoms])
+        ax.scatter(coords[:, 0], coords[:, 1], c=[get_element_color(e) for e in elements],
+                   edgecolors='k')
+        for (x, y, _), element in zip(coords, elements):
+            ax.text(x, y, element)
+
+        # Legs in path order: absorber -> scatterers -> back to absorber
+        handles = []
+        for (name, color), segments in zip(LEG_CLASSES, path_leg_segments([self.atoms])):
+            if len(segments):
+                ax.add_collection(LineCollection(segments[:, :, :2], colors=color))
+                handles.append(Line2D([], [], color=color, label=name))
+
+        ax.set_xlabel('X')
+        ax.set_ylabel('Y')
+        ax.set_title('2D Atomic Structure')
+        ax.legend(handles=handles)
 
     def plot_all_views(self, fig=None, ax3d=None, ax_xy=None, ax_xz=None, ax_yz=None):
         """Plot the structure on the given axes."""
-        if ax3d is None or fig is None:
-            fig = plt.figure(figsize=(12, 8))
-            ax3d = fig.add_subplot(221, projection='3d')
-            ax_xy = fig.add_subplot(222)
-            ax_xz = fig.add_subplot(223)
-            ax_yz = fig.add_subplot(224)
-
-        # 3D plot
-        for atom in self.atoms:
-            ax3d.scatter(atom['x'], atom['y'], atom['z'], label=atom['element'])
-            ax3d.text(atom['x'], atom['y'], atom['z'], atom['element'])
-
-        # Plot connections in correct order: Fe-C, C-C, then back to absorber
-        # First, find Fe and C atoms
-        fe_atoms = [a for a in self.atoms if a['element'] == 'Fe']
-        c_atoms = [a for a in self.atoms if a['element'] == 'C']
-
-        # Plot Fe-C connections
-        for fe in fe_atoms:
-            for c in c_atoms:
-                ax3d.plot([fe['x'], c['x']],
-                         [fe['y'], c['y']],
-                         [fe['z'], c['z']],
-                         'r-', label='Fe-C' if 'Fe-C' not in ax3d.get_legend_handles_labels()[1] else '')
-
-        # Plot C-C connections
-        for i in range(len(c_atoms)):
-            for j in range(i + 1, len(c_atoms)):
-                c1 = c_atoms[i]
-                c2 = c_atoms[j]
-                ax3d.plot([c1['x'], c2['x']],
-                         [c1['y'], c2['y']],
-                         [c1['z'], c2['z']],
-                         'b-', label='C-C' if 'C-C' not in ax3d.get_legend_handles_labels()[1] else '')
-
-        # Plot back to absorber (first atom)
-        for c in c_atoms:
-            ax3d.plot([c['x'], self.atoms[0]['x']],
-                     [c['y'], self.atoms[0]['y']],
-                     [c['z'], self.atoms[0]['z']],
-                     'g-', label='Back to Absorber' if 'Back to Absorber' not in ax3d.get_legend_handles_labels()[1] else '')
-
-        ax3d.set_xlabel('X')
-        ax3d.set_ylabel('Y')
-        ax3d.set_zlabel('Z')
-        ax3d.set_title('3D View')
-        ax3d.legend()
-
-        # XY plane
-        for atom in self.atoms:
-            ax_xy.scatter(atom['x'], atom['y'], label=atom['element'])
-            ax_xy.text(atom['x'], atom['y'], atom['element'])
-        for i in range(1, len(self.atoms)):
-            ax_xy.plot([self.atoms[0]['x'], self.atoms[i]['x']],
-                      [self.atoms[0]['y'], self.atoms[i]['y']],
-                      'k--')
-        ax_xy.set_xlabel('X')
-        ax_xy.set_ylabel('Y')
-        ax_xy.set_title('XY Plane')
-        
-        # XZ plane
-        for atom in self.atoms:
-            ax_xz.scatter(atom['x'], atom['z'], label=atom['element'])
-            ax_xz.text(atom['x'], atom['z'], atom['element'])
-        for i in range(1, len(self.atoms)):
-            ax_xz.plot([self.atoms[0]['x'], self.atoms[i]['x']],
-                      [self.atoms[0]['z'], self.atoms[i]['z']],
-                      'k--')
-        ax_xz.set_xlabel('X')
-        ax_xz.set_ylabel('Z')
-        ax_xz.set_title('XZ Plane')
-        
-        # YZ plane
-        for atom in self.atoms:
-            ax_yz.scatter(atom['y'], atom['z'], label=atom['element'])
-            ax_yz.text(atom['y'], atom['z'], atom['element'])
-        for i in range(1, len(self.atoms)):
-            ax_yz.plot([self.atoms[0]['y'], self.atoms[i]['y']],
-                      [self.atoms[0]['z'], self.atoms[i]['z']],
-                      'k--')
-        ax_yz.set_xlabel('Y')
-        ax_yz.set_ylabel('Z')
-        ax_yz.set_title('YZ Plane')
-
-
-        return fig, ax3d, ax_xy, ax_xz, ax_yz
+        return plot_paths([self.atoms], fig, ax3d, ax_xy, ax_xz, ax_yz)
+
+
+def plot_paths(paths, fig=None, ax3d=None, ax_xy=None, ax_xz=None, ax_yz=None,
+               max_labels=100, legend=True, legend_handles=None):
+    """
+    Overlay any number of paths on the four views.
+
+    All legs of one class become a single (3D) line collection per view and
+    the legend is built once from proxy artists, so the cost stays flat in
+    the number of artists however many paths are drawn.
+
+    Parameters:
+    -----------
+    paths : list of Structure
+        Path atoms, absorber first, in scattering order
+    max_labels : int, optional
+        Element labels are only drawn when the paths visit at most this many
+        distinct sites, since every label is its own artist (default: 100;
+        None labels every site)
+    legend : bool, optional
+        Rebuild the 3D legend with the leg classes (default: True)
+    legend_handles : list of Artist, optional
+        Entries listed before the leg classes, e.g. the element entries of
+        CrystalViewer.legend_handles; labelled artists of ax3d follow them
+    """
+    if ax3d is None or fig is None:
+        fig = plt.figure(figsize=(12, 8))
+        ax3d = fig.add_subplot(221, projection='3d')
+        ax_xy = fig.add_subplot(222)
+        ax_xz = fig.add_subplot(223)
+        ax_yz = fig.add_subplot(224)
+
+    coords, elements = unique_path_atoms(paths)
+    colors = [get_element_color(e) for e in elements]
+    legs = path_leg_segments(paths)
+    radial = radial_segments(paths)
+    show_labels = max_labels is None or len(coords) <= max_labels
+
+    # 3D plot
+    ax3d.scatter(coords[:, 0], coords[:, 1], coords[:, 2], c=colors, edgecolors='k',
+                 depthshade=False)
+    if show_labels:
+        for (x, y, z), element in zip(coords, elements):
+            ax3d.text(x, y, z, element)
+
+    handles = list(legend_handles or [])
+    labels = [h.get_label() for h in handles]
+    labelled, names = ax3d.get_legend_handles_labels()
+    handles += labelled
+    labels += names
+    for (name, color), segments in zip(LEG_CLASSES, legs):
+        if len(segments):
+            ax3d.add_collection3d(Line3DCollection(segments, colors=color))
+            handles.append(Line2D([], [], color=color))
+            labels.append(name)
+
+    ax3d.set_xlabel('X')
+    ax3d.set_ylabel('Y')
+    ax3d.set_zlabel('Z')
+    ax3d.set_title('3D View')
+    if legend:
+        ax3d.legend(handles, labels)
+
+    # 2D projections: dashed lines from the absorber to every path atom
+    for ax, h, v, title in ((ax_xy, 0, 1, 'XY Plane'), (ax_xz, 0, 2, 'XZ Plane'),
+                            (ax_yz, 1, 2, 'YZ Plane')):
+        ax.scatter(coords[:, h], coords[:, v], c=colors, edgecolors='k')
+        if show_labels:
+            for point, element in zip(coords, elements):
+                ax.text(point[h], point[v], element)
+        if len(radial):
+            ax.add_collection(LineCollection(radial[:, :, [h, v]], colors='k', linestyles='--'))
+        ax.set_xlabel('XYZ'[h])
+        ax.set_ylabel('XYZ'[v])
+        ax.set_title(title)
+
+    return fig, ax3d, ax_xy, ax_xz, ax_yz
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python path_viewer.py <feff_file>")
-        sys.exit(1)
+    import argparse
+    from profiling import add_profile_arguments, profiler_from_args
+
+    parser = argparse.ArgumentParser(description='Visualize a FEFF scattering path')
+    parser.add_argument('feff_file', help='Path to the feffNNNN.dat file')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiler_from_args(args)
     
-    viewer = PathViewer(sys.argv[1])
-    viewer.plot_all_views()
+    with profiler.stage('parse paths'):
+        viewer = PathViewer(args.feff_file)
+    with profiler.stage('build artists'):
+        fig = viewer.plot_all_views()[0]
     #iewer.plot_3d()
     plt.tight_layout()
+    if profiler.enabled:
+        with profiler.stage('draw'):
+            fig.canvas.draw()
+        profiler.count_artists(fig)
+    profiler.finish(args.profile_json)
     plt.show()
 
 if __name__ == '__main__':
@@ -0,0 +1,132 @@
+import mmap
+import re
+
+import numpy as np
+
+from feff_io import FeffPath
+from path_collection import path_mask, path_summary
+from structure import Structure
+
+_BLOCK_RE = re.compile(
+    rb'^[ \t]*(\d+)[ \t]+(\d+)[ \t]+([-+.\dEe]+)[ \t]+index, nleg, degeneracy, r=[ \t]*([-+.\dEe]+)',
+    re.MULTILINE)
+
+
+class PathsDat:
+    """
+    Lazy, indexed reader for a FEFF paths.dat file.
+
+    Opening the file makes a single regex pass over a memory map and records
+    the byte offset of every path block together with its index, nleg,
+    degeneracy and reff. The geometry of a path is only parsed when the path
+    is requested, and parsed paths are kept for later requests.
+
+    Parameters:
+    -----------
+    paths_file : str
+        Path to the paths.dat file
+
+    Examples:
+    ---------
+    >>> with PathsDat('paths.dat') as paths:
+    ...     for index in paths.select(nleg=2, reff_max=4.0):
+    ...         path = paths[index]
+    """
+
+    def __init__(self, paths_file):
+        self.paths_file = paths_file
+        self._file = open(paths_file, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{paths_file} is empty") from None
+        self._cache = {}
+        self._build_index()
+
+    def _build_index(self):
+        rows = [(m.start(), *m.groups()) for m in _BLOCK_RE.finditer(self._map)]
+        if not rows:
+            self.close()
+            raise ValueError("Could not find any path blocks in paths.dat file")
+        self.offsets = np.array([r[0] for r in rows] + [len(self._map)], dtype=np.int64)
+        self.index = np.array([int(r[1]) for r in rows], dtype=np.int64)
+        self.nleg = np.array([int(r[2]) for r in rows], dtype=np.int64)
+        self.degeneracy = np.array([float(r[3]) for r in rows], dtype=np.float64)
+        self.reff = np.array([float(r[4]) for r in rows], dtype=np.float64)
+        self._position = {int(i): k for k, i in enumerate(self.index)}
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, index):
+        return index in self._position
+
+    def __iter__(self):
+        """Iterate over the path numbers (not the materialised paths)."""
+        return iter(self.index.tolist())
+
+    def __repr__(self):
+        return f"PathsDat({self.paths_file!r}, {len(self)} paths)"
+
+    def __getitem__(self, index):
+        """Materialise and return the path with the given path number."""
+        if index not in self._cache:
+            try:
+                k = self._position[index]
+            except KeyError:
+                raise KeyError(f"No path {index} in {self.paths_file}") from None
+            block = self._map[self.offsets[k]:self.offsets[k + 1]]
+            self._cache[index] = self._parse_block(k, block.decode('ascii', 'replace'))
+        return self._cache[index]
+
+    def _parse_block(self, k, text):
+        coords, elements, pots = [], [], []
+        # Skip the index/nleg line and the column header
+        atom_lines = [line for line in text.splitlines()[1:]
+                      if line.split()[:1] and line.split()[0][0] in '+-.0123456789']
+        for line in atom_lines[:int(self.nleg[k])]:
+            if "'" in line:
+                head, label, _ = line.split("'", 2)
+            else:
+                head, label = line.rsplit(None, 3)[0].rsplit(None, 1)
+            parts = head.split()
+            coords.append([float(parts[0]), float(parts[1]), float(parts[2])])
+            pots.append(int(parts[3]))
+            elements.append(label.strip())
+
+        # paths.dat lists the absorber last; put it first as in feffNNNN.dat
+        order = [len(coords) - 1] + list(range(len(coords) - 1))
+        atoms = Structure([coords[i] for i in order], [elements[i] for i in order],
+                          pots=[pots[i] for i in order])
+        return FeffPath(int(self.index[k]), int(self.nleg[k]), float(self.degeneracy[k]),
+                        float(self.reff[k]), atoms, source=self.paths_file)
+
+    def mask(self, **criteria):
+        """
+        Boolean mask over the indexed paths for the criteria of
+        :func:`path_collection.path_mask` (paths.dat has no amplitude ratios).
+        """
+        return path_mask(self, **criteria)
+
+    def select(self, **criteria):
+        """Path numbers matching the criteria accepted by :meth:`mask`."""
+        return self.index[self.mask(**criteria)].tolist()
+
+    def filter(self, **criteria):
+        """Return the paths matching the criteria accepted by :meth:`mask` (parsing them)."""
+        return [self[index] for index in self.select(**criteria)]
+
+    def summary(self):
+        """Return a plain-text table of the indexed paths."""
+        return path_summary(self)
@@ -0,0 +1,88 @@
+import numpy as np
+
+from view_data import get_element_color, path_leg_segments
+
+
+def _require_plotly():
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        raise ImportError("The HTML export needs the optional 'plotly' package "
+                          "(pip install plotly)") from None
+    return go
+
+
+def _segment_trace_xyz(segments):
+    """Flatten (m, 2, 3) segments into x/y/z arrays with NaN breaks between segments."""
+    out = np.full((len(segments), 3, 3), np.nan)
+    out[:, :2] = segments
+    out = out.reshape(-1, 3)
+    return out[:, 0], out[:, 1], out[:, 2]
+
+
+def export_html(out_file, structure=None, paths=(), dot_size=100, highlight=None,
+                title='EXAFS path viewer'):
+    """
+    Write a self-contained interactive 3D view (Plotly, WebGL) to an HTML file.
+
+    The crystal becomes one WebGL marker trace per element with the site
+    labels as hover text. Each path becomes one line trace (its legs joined
+    with NaN breaks) grouped in the legend by leg count, so paths can be
+    toggled individually or per group. plotly.js is embedded in the file,
+    which therefore opens offline without a server.
+
+    Parameters:
+    -----------
+    out_file : str
+        HTML file to write
+    structure : Structure, optional
+        Crystal atoms
+    paths : list of FeffPath, optional
+        Paths to overlay
+    dot_size : int, optional
+        Scatter size as used by the matplotlib views (area in points^2);
+        converted to a marker diameter (default: 100)
+    highlight : array_like, shape (n, 3), optional
+        Crystal sites to ring, e.g. those matched to path atoms
+    title : str, optional
+        Figure title
+    """
+    go = _require_plotly()
+    fig = go.Figure()
+    marker_size = max(2.0, np.sqrt(dot_size) / 2)
+
+    if structure is not None:
+        for element, idx in structure.iter_elements():
+            xyz = structure.coords[idx]
+            fig.add_trace(go.Scatter3d(
+                x=xyz[:, 0], y=xyz[:, 1], z=xyz[:, 2], mode='markers', name=element,
+                marker=dict(size=marker_size, color=get_element_color(element),
+                            line=dict(width=0)),
+                hovertext=structure.labels_of(idx), hoverinfo='text'))
+
+    if highlight is not None and len(highlight):
+        highlight = np.asarray(highlight, dtype=float).reshape(-1, 3)
+        fig.add_trace(go.Scatter3d(
+            x=highlight[:, 0], y=highlight[:, 1], z=highlight[:, 2], mode='markers',
+            name='Path sites', hoverinfo='skip',
+            marker=dict(size=marker_size * 1.6, color='rgba(0,0,0,0)',
+                        line=dict(color='magenta', width=4))))
+
+    for path in paths:
+        segments = np.concatenate(path_leg_segments([path.atoms]))
+        x, y, z = _segment_trace_xyz(segments)
+        elements = '-'.join(path.atoms.element_names_of_atoms())
+        fig.add_trace(go.Scatter3d(
+            x=x, y=y, z=z, mode='lines+markers', name=f"path {path.index}",
+            legendgroup=f"nleg {path.nleg}", legendgrouptitle_text=f"nleg {path.nleg}",
+            line=dict(width=5), marker=dict(size=marker_size * 0.8),
+            hovertext=f"path {path.index}: {elements}, reff={path.reff:.4f}, "
+                      f"deg={path.degeneracy:g}",
+            hoverinfo='text'))
+
+    fig.update_layout(title=title, scene=dict(aspectmode='data', xaxis_title='X',
+                                              yaxis_title='Y', zaxis_title='Z'),
+                      legend=dict(groupclick='toggleitem'),
+                      margin=dict(l=0, r=0, t=40, b=0))
+    fig.write_html(out_file, include_plotlyjs=True, full_html=True)
+    return out_file
@@ -0,0 +1,154 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_NO_STAGE = nullcontext()
+
+
+class Profiler:
+    """
+    Per-stage wall time, peak memory and artist counts of a run.
+
+    Wrap each stage in ``with profiler.stage('parse inp'):``. When the
+    profiler is disabled ``stage`` returns a shared no-op context and
+    ``count_artists`` returns at once, so instrumented code costs next to
+    nothing in normal runs.
+
+    When enabled, every stage records its wall time and the peak resident
+    set size of the process at its end (a high-water mark, so it only grows
+    from stage to stage). With ``trace_memory=True`` tracemalloc also
+    records the peak of Python-side allocations (numpy arrays included,
+    Agg canvas buffers not) within each stage; tracing slows allocation-heavy
+    stages such as the draw several times, so keep it off when comparing
+    timings. A stage that runs more than once accumulates its time and
+    keeps the largest peaks.
+
+    Parameters:
+    -----------
+    enabled : bool, optional
+        Record stages (default: False)
+    trace_memory : bool, optional
+        Trace per-stage peak memory with tracemalloc (default: False)
+    """
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = enabled
+        self.memory = trace_memory and enabled
+        self.stages = {}
+        self.artists = {}
+        self.finished = False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name):
+        """Context manager timing one stage (a no-op when disabled)."""
+        if not self.enabled:
+            return _NO_STAGE
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        if self.memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.memory else None
+            entry = self.stages.setdefault(name, {'seconds': 0.0, 'max_rss_mb': None,
+                                                  'traced_peak_mb': None, 'calls': 0})
+            entry['seconds'] += seconds
+            entry['calls'] += 1
+            entry['max_rss_mb'] = max_rss_mb()
+            if peak is not None:
+                entry['traced_peak_mb'] = max(entry['traced_peak_mb'] or 0.0, peak / 1024 ** 2)
+
+    def count_artists(self, fig, name=None):
+        """Record the number of artists of each kind on every axis of ``fig``."""
+        if not self.enabled:
+            return
+        name = name or f"figure {getattr(fig, 'number', '')}".strip()
+        for i, ax in enumerate(fig.axes):
+            title = ax.get_title() or f"axes {i}"
+            counts = {'collections': len(ax.collections), 'lines': len(ax.lines),
+                      'texts': len(ax.texts), 'patches': len(ax.patches),
+                      'images': len(ax.images)}
+            counts['total'] = sum(counts.values())
+            self.artists[f"{name}: {title}"] = counts
+
+    def report(self):
+        """Return the recorded stages and artist counts as a dict."""
+        return {'stages': self.stages, 'artists': self.artists,
+                'total_seconds': sum(s['seconds'] for s in self.stages.values())}
+
+    def print_report(self):
+        if not self.enabled:
+            return
+        print(f"{'stage':20s} {'time (ms)':>11s} {'max RSS (MB)':>13s} {'traced (MB)':>12s} "
+              f"{'calls':>6s}")
+        for name, entry in self.stages.items():
+            rss, traced = (('-' if v is None else f"{v:.1f}")
+                           for v in (entry['max_rss_mb'], entry['traced_peak_mb']))
+            print(f"{name:20s} {entry['seconds'] * 1e3:11.2f} {rss:>13s} {traced:>12s} "
+                  f"{entry['calls']:6d}")
+        if self.artists:
+            print(f"\n{'axis':40s} {'coll':>6s} {'lines':>6s} {'texts':>6s} {'patch':>6s} {'total':>6s}")
+            for name, c in self.artists.items():
+                print(f"{name:40s} {c['collections']:6d} {c['lines']:6d} {c['texts']:6d} "
+                      f"{c['patches']:6d} {c['total']:6d}")
+
+    def write_json(self, out_file):
+        """Write the report as JSON, e.g. for tracking trends across runs."""
+        report = self.report()
+        report['created'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        with open(out_file, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def finish(self, json_file=None):
+        """
+        Print the report, write it to ``json_file`` if given, and stop tracing.
+
+        Only the first call reports; later calls do nothing.
+        """
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        self.print_report()
+        if json_file:
+            self.write_json(json_file)
+            print(f"Wrote profile to {json_file}")
+        if self.memory:
+            tracemalloc.stop()
+
+
+def max_rss_mb():
+    """Peak resident set size of this process in MB, or None where unavailable."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+
+
+def add_profile_arguments(parser):
+    """Add the --profile, --profile-json and --profile-memory options to an argparse parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='Report wall time and peak memory per stage and artist counts per axis')
+    parser.add_argument('--profile-json', default=None, metavar='FILE',
+                        help='Also write the profile report to this JSON file (implies --profile)')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='Also trace per-stage peak allocations with tracemalloc (implies '
+                             '--profile; slows the profiled stages)')
+
+
+def profiler_from_args(args):
+    enabled = args.profile or args.profile_memory or bool(args.profile_json)
+    return Profiler(enabled=enabled, trace_memory=args.profile_memory)
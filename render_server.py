@@ -0,0 +1,342 @@
+"""
+Long-lived local render server that keeps parsed inputs and figures warm.
+
+Scripts and notebooks request views over HTTP instead of starting the
+viewer each time:
+
+    python main.py serve --port 8765
+    curl "http://127.0.0.1:8765/render?inp=/data/feff.inp&paths=/data/run&n=1,4&crop=6" -o view.png
+
+Query parameters of /render:
+    inp        feff.inp of the crystal (needed for png/svg)
+    paths      FEFF run directory, paths.dat or feffNNNN.dat
+    n          comma-separated path numbers from ``paths`` (default: all of a
+               single feffNNNN.dat, none otherwise)
+    format     png, svg, pdf or html (default: png)
+    view       all, 3d, xy, xz or yz (default: all; png/svg/pdf only)
+    crop       only draw atoms within this radius of the absorber
+    dot_size   scatter size (default: 100)
+    dpi        raster resolution (default: 100)
+    labels     1 to label the crystal atoms (default: 0)
+    bonds      1 to draw the crystal bonds (default: 0)
+    lod_atoms  level-of-detail atom count, or off (default: 10000)
+    max_labels, max_3d_atoms, max_2d_atoms
+               level-of-detail limits (default: 300, 5000, 10000)
+
+/stats lists what each worker holds in memory. Requests are served by
+threads that hand the work to a pool of worker processes (matplotlib is not
+thread-safe); every worker keeps LRU caches of parsed structures, path
+sources and ready PathRenderer figures, so a repeated render only draws the
+path overlay.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import socketserver
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from feff_io import FeffPath, read_feff_inp, read_feff_path
+from parse_cache import ParseCache
+from path_collection import load_feff_run, run_files
+from paths_dat import PathsDat
+from spatial_index import CellList
+
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml', 'pdf': 'application/pdf',
+           'html': 'text/html; charset=utf-8'}
+DEFAULT_PORT = 8765
+
+
+class LRU:
+    """Small least-recently-used mapping; ``on_evict`` is called with evicted values."""
+
+    def __init__(self, maxsize, on_evict=None):
+        self.maxsize = maxsize
+        self.on_evict = on_evict
+        self._items = OrderedDict()
+
+    def get(self, key, build):
+        """Return the value of ``key``, calling ``build()`` to create it on a miss."""
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+        value = build()
+        self._items[key] = value
+        while len(self._items) > self.maxsize:
+            _, old = self._items.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(old)
+        return value
+
+    def keys(self):
+        return list(self._items)
+
+
+def parse_render_request(query):
+    """Validate the query parameters of /render into keyword arguments of :func:`render_view`."""
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    fmt = params.get('format', 'png').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {tuple(FORMATS)}")
+    view = params.get('view', 'all').lower()
+    lod_atoms = params.get('lod_atoms', '10000').lower()
+    request = {
+        'inp': params.get('inp'),
+        'paths': params.get('paths'),
+        'numbers': tuple(int(n) for n in params['n'].split(',') if n) if params.get('n') else None,
+        'fmt': fmt,
+        'view': None if view == 'all' else view,
+        'crop': float(params['crop']) if params.get('crop') else None,
+        'dot_size': int(params.get('dot_size', 100)),
+        'dpi': int(params.get('dpi', 100)),
+        'labels': params.get('labels', '0').lower() in ('1', 'true', 'yes'),
+        'bonds': params.get('bonds', '0').lower() in ('1', 'true', 'yes'),
+        'lod_atoms': None if lod_atoms in ('off', 'none') else int(lod_atoms),
+        'max_labels': int(params.get('max_labels', 300)),
+        'max_3d_atoms': int(params.get('max_3d_atoms', 5000)),
+        'max_2d_atoms': int(params.get('max_2d_atoms', 10000)),
+    }
+    if request['max_labels'] < 0 or request['max_3d_atoms'] < 1 or request['max_2d_atoms'] < 1:
+        raise ValueError("max_labels must be >= 0, max_3d_atoms and max_2d_atoms >= 1")
+    if fmt != 'html' and not request['inp']:
+        raise ValueError(f"{fmt} output needs the crystal structure (inp=...)")
+    if not request['inp'] and not request['paths']:
+        raise ValueError("Nothing to render: give inp=... and/or paths=...")
+    for name in ('inp', 'paths'):
+        if request[name] is not None:
+            request[name] = os.path.abspath(request[name])
+            if not os.path.exists(request[name]):
+                raise FileNotFoundError(request[name])
+    return request
+
+
+# Per-process state, created by the pool initializer
+_state = None
+
+def _file_key(name):
+    """
+    Cache key of a file or FEFF run directory that changes when it is modified.
+
+    Rerunning FEFF rewrites the feffNNNN.dat files in place, which leaves the
+    directory mtime alone, so a run is keyed on the stat of all its files.
+    """
+    if os.path.isdir(name):
+        digest = hashlib.sha1()
+        for path in run_files(name):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+        return (name, digest.hexdigest())
+    stat = os.stat(name)
+    return (name, stat.st_mtime_ns, stat.st_size)
+
+def _close_renderer(renderer):
+    import matplotlib.pyplot as plt
+    plt.close(renderer.fig)
+
+def _init_worker(max_structures, max_renderers, cache_dir, use_cache):
+    global _state
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+    _state = {
+        'cache': ParseCache(cache_dir) if use_cache else None,
+        'structures': LRU(max_structures),
+        'paths': LRU(max_structures, on_evict=lambda s: s.close() if hasattr(s, 'close') else None),
+        'renderers': LRU(max_renderers, on_evict=_close_renderer),
+    }
+
+def _structure(inp, crop):
+    cache = _state['cache']
+
+    def parse():
+        return cache.load_structure(inp) if cache is not None else read_feff_inp(inp)
+    structure = _state['structures'].get(_file_key(inp), parse)
+    if crop is None:
+        return structure
+
+    def cropped():
+        index = CellList(structure.coords)
+        return structure.subset(index.crop(structure.coords[structure.absorber_index()], crop))
+    return _state['structures'].get((_file_key(inp), crop), cropped)
+
+def _paths(source, numbers):
+    cache = _state['cache']
+
+    def load():
+        if os.path.isdir(source):
+            return cache.load_run(source) if cache is not None else load_feff_run(source)
+        if os.path.basename(source).lower() == 'paths.dat':
+            return PathsDat(source)
+        return read_feff_path(source)
+    loaded = _state['paths'].get(_file_key(source), load)
+    if isinstance(loaded, FeffPath):
+        return [loaded] if numbers is None or loaded.index in numbers else []
+    return [loaded[n] for n in numbers or ()]
+
+def render_view(inp=None, paths=None, numbers=None, fmt='png', view=None, crop=None,
+                dot_size=100, dpi=100, labels=False, bonds=False, lod_atoms=10000, max_labels=300,
+                max_3d_atoms=5000, max_2d_atoms=10000):
+    """Render one request in a worker process and return the encoded bytes."""
+    selected = _paths(paths, numbers) if paths else []
+    structure = _structure(inp, crop) if inp else None
+    out = io.BytesIO()
+    if fmt == 'html':
+        from plotly_export import export_html
+        text = io.StringIO()
+        export_html(text, structure=structure, paths=selected, dot_size=dot_size)
+        return text.getvalue().encode('utf-8')
+
+    from batch_render import PathRenderer
+    key = (_file_key(inp), crop, dot_size, dpi, labels, bonds, lod_atoms, max_labels, max_3d_atoms,
+           max_2d_atoms)
+    renderer = _state['renderers'].get(key, lambda: PathRenderer(
+        structure, dot_size=dot_size, show_labels=labels, dpi=dpi, show_bonds=bonds,
+        lod_atoms=lod_atoms, max_labels=max_labels, max_3d_atoms=max_3d_atoms,
+        max_2d_atoms=max_2d_atoms))
+    renderer.render([p.atoms for p in selected], out, fmt=fmt, view=view)
+    return out.getvalue()
+
+def worker_stats():
+    """What this worker holds in memory."""
+    return {'pid': os.getpid(),
+            'structures': [str(k) for k in _state['structures'].keys()],
+            'paths': [str(k) for k in _state['paths'].keys()],
+            'renderers': [str(k) for k in _state['renderers'].keys()]}
+
+
+class RenderServer:
+    """
+    Pool of warm render workers behind a small HTTP interface.
+
+    Parameters:
+    -----------
+    workers : int, optional
+        Worker processes (default: CPU count)
+    max_structures : int, optional
+        Parsed structures and path sources kept per worker (default: 16)
+    max_renderers : int, optional
+        Ready crystal figures kept per worker (default: 8)
+    cache_dir : str, optional
+        Parse cache directory used on a cold start (default: ParseCache default)
+    use_cache : bool, optional
+        Read and fill the on-disk parse cache (default: True)
+    """
+
+    def __init__(self, workers=None, max_structures=16, max_renderers=8, cache_dir=None,
+                 use_cache=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(max_structures, max_renderers, cache_dir, use_cache))
+
+    def render(self, query):
+        """Return (body, content type) for a /render query string."""
+        request = parse_render_request(query)
+        return self.pool.submit(render_view, **request).result(), FORMATS[request['fmt']]
+
+    def stats(self):
+        """Cache contents of the workers (busy workers may be missing)."""
+        futures = [self.pool.submit(worker_stats) for _ in range(self.workers)]
+        # Each idle worker answers one; duplicates are dropped
+        return list({s['pid']: s for s in (f.result() for f in futures)}.values())
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def address_string(self):
+                # Unix socket clients have no address
+                return self.client_address[0] if self.client_address else 'unix'
+
+            def _reply(self, status, body, content_type='text/plain; charset=utf-8'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                try:
+                    if url.path == '/render':
+                        body, content_type = server.render(url.query)
+                        self._reply(200, body, content_type)
+                    elif url.path == '/stats':
+                        self._reply(200, json.dumps(server.stats(), indent=2).encode(),
+                                    'application/json')
+                    else:
+                        self._reply(404, b"Unknown endpoint; use /render or /stats\n")
+                except FileNotFoundError as err:
+                    self._reply(404, f"No such file: {err}\n".encode())
+                except (ValueError, KeyError) as err:
+                    self._reply(400, f"Bad request: {err}\n".encode())
+                except Exception as err:
+                    self._reply(500, f"Render failed: {err!r}\n".encode())
+
+        return Handler
+
+    def serve(self, host='127.0.0.1', port=DEFAULT_PORT, socket_path=None):
+        """Serve until interrupted, on host:port or on a Unix socket."""
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            httpd = _UnixHTTPServer(socket_path, self.handler())
+            where = f"unix socket {socket_path}"
+        else:
+            httpd = ThreadingHTTPServer((host, port), self.handler())
+            where = f"http://{host}:{httpd.server_address[1]}"
+        print(f"Serving renders on {where} with {self.workers} workers (Ctrl-C to stop)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+            self.pool.shutdown()
+            if socket_path is not None and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+    def serve_in_thread(self, host='127.0.0.1', port=0):
+        """Start serving on a background thread (e.g. from a notebook); return the server."""
+        httpd = ThreadingHTTPServer((host, port), self.handler())
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return httpd
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve rendered crystal/path views from warm '
+                                                 'worker processes')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'TCP port (default: {DEFAULT_PORT})')
+    parser.add_argument('--socket', default=None, metavar='PATH',
+                        help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Render worker processes (default: CPU count)')
+    parser.add_argument('--max-structures', type=int, default=16,
+                        help='Parsed structures kept in memory per worker (default: 16)')
+    parser.add_argument('--max-figures', type=int, default=8,
+                        help='Ready crystal figures kept per worker (default: 8)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not use the on-disk parse cache')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Parse cache directory (default: ~/.cache/exafs_path_viewer)')
+    args = parser.parse_args(argv)
+
+    server = RenderServer(workers=args.workers, max_structures=args.max_structures,
+                          max_renderers=args.max_figures, cache_dir=args.cache_dir,
+                          use_cache=not args.no_cache)
+    server.serve(args.host, args.port, socket_path=args.socket)
+
+
+if __name__ == '__main__':
+    main()
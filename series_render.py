@@ -0,0 +1,331 @@
+import glob
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.image import imsave
+
+from crystal_viewer import depth_alpha, element_rgba, get_element_color
+from feff_io import read_feff_inp
+from parse_cache import ParseCache
+from spatial_index import CellList
+
+MOVIE_FORMATS = ('gif', 'mp4')
+
+
+def series_files(pattern):
+    """Files matching a glob pattern, in natural order (frame2 before frame10)."""
+    def natural(name):
+        return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+    return sorted(glob.glob(pattern), key=natural)
+
+
+def _parse_frame(job):
+    inp_file, cache_dir = job
+    if cache_dir is not None:
+        return ParseCache(cache_dir).load_structure(inp_file)
+    return read_feff_inp(inp_file)
+
+
+def load_series(files, workers=None, cache_dir=None, use_cache=True):
+    """
+    Parse many feff.inp files in parallel.
+
+    Parameters:
+    -----------
+    files : list of str
+        Input files, one per frame
+    workers : int, optional
+        Worker processes (default: CPU count)
+    cache_dir : str, optional
+        Parse cache directory (default: the ParseCache default)
+    use_cache : bool, optional
+        Read and fill the parse cache (default: True)
+
+    Returns:
+    --------
+    list of Structure
+        In the order of ``files``
+    """
+    if use_cache:
+        cache_dir = ParseCache(cache_dir).directory
+    jobs = [(f, cache_dir if use_cache else None) for f in files]
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        return [_parse_frame(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_parse_frame, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def prepare_frames(structures, track_absorber=False, crop=None):
+    """
+    Per-frame coordinates and element codes on a shared element table.
+
+    With ``track_absorber`` every frame is translated so that its absorber
+    sits at the origin; with ``crop`` only atoms within that radius of the
+    absorber are kept.
+
+    Returns:
+    --------
+    frames : list of (ndarray (n, 3), ndarray of int (n,))
+    element_names : list of str
+        Elements of all frames in order of first appearance
+    """
+    element_names = list(dict.fromkeys(e for s in structures for e in s.element_names))
+    lookup = {e: k for k, e in enumerate(element_names)}
+    frames = []
+    for s in structures:
+        coords = s.coords
+        codes = np.array([lookup[e] for e in s.element_names], dtype=np.int32)[s.element_codes]
+        center = coords[s.absorber_index()]
+        if crop is not None:
+            keep = CellList(coords).crop(center, crop)
+            coords, codes = coords[keep], codes[keep]
+        if track_absorber:
+            coords = coords - center
+        frames.append((coords, codes))
+    return frames, element_names
+
+
+def frame_limits(frames, pad=0.5):
+    """One (lo, hi) pair per axis that holds every frame."""
+    points = [coords for coords, _ in frames if len(coords)]
+    if not points:
+        return [(-1.0, 1.0)] * 3
+    lo = np.min([p.min(axis=0) for p in points], axis=0) - pad
+    hi = np.max([p.max(axis=0) for p in points], axis=0) + pad
+    return list(zip(lo.tolist(), hi.tolist()))
+
+
+class FrameRenderer:
+    """
+    Render frames of a structure series on one reusable figure.
+
+    The four views are set up once with fixed limits, and each element gets
+    one scatter per view that is kept for the whole series. The empty axes
+    are rasterised once; a frame restores that background, replaces the
+    scatter offsets and colours in place and draws only those artists.
+
+    Parameters:
+    -----------
+    element_names : list of str
+        Elements of the series (one scatter per element per view)
+    limits : list of (float, float)
+        x, y and z limits shared by every frame
+    dot_size : int, optional
+        Size of the scatter points (default: 100)
+    dpi : int, optional
+        Frame resolution (default: 100)
+    """
+
+    def __init__(self, element_names, limits, dot_size=100, dpi=100):
+        self.fig = plt.figure(figsize=(12, 8), dpi=dpi)
+        self.dpi = dpi
+        ax_xy = self.fig.add_subplot(221)
+        ax_xz = self.fig.add_subplot(222)
+        ax_yz = self.fig.add_subplot(223)
+        self.ax3d = self.fig.add_subplot(224, projection='3d')
+        # (axis, horizontal column, vertical column, depth column)
+        self.views = [(ax_xy, 0, 1, 2), (ax_xz, 0, 2, 1), (ax_yz, 1, 2, 0)]
+
+        self.colors = [get_element_color(e) for e in element_names]
+        self.scatter3d, self.scatter2d = [], []
+        for element, color in zip(element_names, self.colors):
+            self.scatter3d.append(self.ax3d.scatter([], [], [], s=dot_size, depthshade=False,
+                                                    animated=True))
+            self.ax3d.scatter([], [], [], s=dot_size, color=color, label=element)
+            self.scatter2d.append([ax.scatter(np.empty(0), np.empty(0), s=dot_size, animated=True)
+                                   for ax, _, _, _ in self.views])
+        self.title = self.fig.text(0.5, 0.98, '', ha='center', va='top', animated=True)
+
+        self.ax3d.set_xlim(*limits[0])
+        self.ax3d.set_ylim(*limits[1])
+        self.ax3d.set_zlim(*limits[2])
+        self.ax3d.set_xlabel('X')
+        self.ax3d.set_ylabel('Y')
+        self.ax3d.set_zlabel('Z')
+        self.ax3d.set_title('3D View')
+        self.ax3d.legend()
+        for (ax, h, v, _), title in zip(self.views, ('XY Plane', 'XZ Plane', 'YZ Plane')):
+            ax.set_xlim(*limits[h])
+            ax.set_ylim(*limits[v])
+            ax.set_xlabel('XYZ'[h])
+            ax.set_ylabel('XYZ'[v])
+            ax.set_title(title)
+        for ax in [self.ax3d] + [ax for ax, _, _, _ in self.views]:
+            ax.set_autoscale_on(False)
+
+        self.fig.canvas.draw()
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def render(self, coords, codes, title, out_file):
+        """Draw one frame (coordinates and element codes) and save it as PNG."""
+        canvas = self.fig.canvas
+        canvas.restore_region(self._background)
+        for k, color in enumerate(self.colors):
+            xyz = coords[codes == k]
+            alphas = depth_alpha(xyz)
+            self.scatter3d[k]._offsets3d = (xyz[:, 0], xyz[:, 1], xyz[:, 2])
+            self.scatter3d[k].set_facecolors(element_rgba(color, alphas[:, 2]))
+            self.scatter3d[k].do_3d_projection()
+            self.ax3d.draw_artist(self.scatter3d[k])
+            for scatter, (ax, h, v, d) in zip(self.scatter2d[k], self.views):
+                scatter.set_offsets(xyz[:, [h, v]])
+                scatter.set_facecolors(element_rgba(color, alphas[:, d]))
+                ax.draw_artist(scatter)
+        self.title.set_text(title)
+        self.fig.draw_artist(self.title)
+        imsave(out_file, np.asarray(canvas.buffer_rgba()), dpi=self.dpi)
+        return out_file
+
+
+# Per-process renderer, created by the pool initializer
+_renderer = None
+
+def _init_worker(element_names, limits, options):
+    global _renderer
+    plt.switch_backend('Agg')
+    _renderer = FrameRenderer(element_names, limits, **options)
+
+def _render_job(job):
+    return _renderer.render(*job)
+
+
+def render_frames(frames, titles, out_dir, element_names, limits, workers=None, **options):
+    """
+    Render every frame to ``out_dir/frame_NNNNN.png`` in a process pool.
+
+    Each worker builds one FrameRenderer and reuses it for all its frames.
+
+    Returns:
+    --------
+    list of str
+        Written frame files, in frame order
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(coords, codes, title, os.path.join(out_dir, f"frame_{k:05d}.png"))
+            for k, ((coords, codes), title) in enumerate(zip(frames, titles), start=1)]
+    if not jobs:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers == 1:
+        _init_worker(element_names, limits, options)
+        return [_render_job(job) for job in jobs]
+    # Contiguous chunks keep each worker on neighbouring frames
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(element_names, limits, options)) as pool:
+        return list(pool.map(_render_job, jobs, chunksize=chunksize))
+
+
+def _require_ffmpeg():
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("MP4 output needs ffmpeg on the PATH; write a .gif or a frame "
+                           "directory instead")
+    return ffmpeg
+
+
+def assemble_movie(frame_files, out_file, fps=10):
+    """Join PNG frames into a GIF (Pillow) or an MP4 (needs ffmpeg on the PATH)."""
+    fmt = os.path.splitext(out_file)[1].lstrip('.').lower()
+    if fmt == 'gif':
+        from PIL import Image
+        first, *rest = frame_files
+        with Image.open(first) as image:
+            image.convert('RGB').save(out_file, save_all=True, loop=0,
+                                      duration=int(round(1000 / fps)),
+                                      append_images=(Image.open(f).convert('RGB') for f in rest))
+    elif fmt == 'mp4':
+        ffmpeg = _require_ffmpeg()
+        pattern = os.path.join(os.path.dirname(frame_files[0]), 'frame_%05d.png')
+        subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps), '-i', pattern,
+                        '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', out_file],
+                       check=True)
+    else:
+        raise ValueError(f"Unknown movie format {fmt!r}; expected one of {MOVIE_FORMATS}")
+    return out_file
+
+
+def output_format(out):
+    """
+    Movie format for an ``--animate`` target, or None for a frame directory.
+
+    Frames are written when ``out`` is an existing directory or has no
+    extension; any other extension must be one of MOVIE_FORMATS.
+
+    Raises:
+    -------
+    ValueError
+        If ``out`` has an unsupported extension
+    """
+    if os.path.isdir(out):
+        return None
+    ext = os.path.splitext(out)[1]
+    if not ext:
+        return None
+    fmt = ext.lstrip('.').lower()
+    if fmt not in MOVIE_FORMATS:
+        raise ValueError(f"Unknown movie format {ext!r} for {out}; expected "
+                         f"{', '.join('.' + f for f in MOVIE_FORMATS)} or a directory")
+    return fmt
+
+
+def render_series(files, out, workers=None, track_absorber=False, crop=None, fps=10,
+                  cache_dir=None, use_cache=True, **options):
+    """
+    Animate a series of feff.inp files (e.g. MD snapshots) with fixed axes.
+
+    Parameters:
+    -----------
+    files : list of str
+        Input files, one per frame, in frame order
+    out : str
+        ``.gif`` or ``.mp4`` file, or a directory (existing, or a path without
+        an extension) for a PNG frame sequence
+    workers : int, optional
+        Worker processes for parsing and rendering (default: CPU count)
+    track_absorber : bool, optional
+        Centre every frame on its absorber (default: False)
+    crop : float, optional
+        Only draw atoms within this radius of the absorber
+    fps : int, optional
+        Frame rate of the movie (default: 10)
+    cache_dir, use_cache
+        Parse cache settings, see :func:`load_series`
+    **options
+        dot_size and dpi, passed to FrameRenderer
+
+    Returns:
+    --------
+    str
+        The movie file or the frame directory
+
+    Raises:
+    -------
+    ValueError
+        If there are no files or ``out`` has an unsupported extension
+    """
+    if not files:
+        raise ValueError("No input files for the series")
+    fmt = output_format(out)
+    if fmt == 'mp4':
+        # Fail before parsing and rendering rather than after
+        _require_ffmpeg()
+    structures = load_series(files, workers=workers, cache_dir=cache_dir, use_cache=use_cache)
+    frames, element_names = prepare_frames(structures, track_absorber=track_absorber, crop=crop)
+    limits = frame_limits(frames)
+    titles = [f"{os.path.relpath(f)}  ({k}/{len(files)})" for k, f in enumerate(files, start=1)]
+
+    if fmt is None:
+        render_frames(frames, titles, out, element_names, limits, workers=workers, **options)
+        return out
+    with tempfile.TemporaryDirectory(prefix='exafs_series_') as tmp:
+        frame_files = render_frames(frames, titles, tmp, element_names, limits,
+                                    workers=workers, **options)
+        return assemble_movie(frame_files, out, fps=fps)
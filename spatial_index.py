@@ -0,0 +1,160 @@
+import numpy as np
+
+
+class CellList:
+    """
+    Uniform-grid spatial index over a fixed set of points.
+
+    Points are binned into cubic cells of edge ``cell_size`` and sorted by
+    cell, so a radius query only visits the cells overlapping the query
+    sphere. The index is built once in O(n log n) and each query costs
+    O(points in the visited cells).
+
+    Parameters:
+    -----------
+    coords : array_like, shape (n, 3)
+        Point coordinates (e.g. ``Structure.coords``)
+    cell_size : float, optional
+        Cell edge in Angstrom; about the typical query radius works best
+        (default: 3.0)
+    """
+
+    def __init__(self, coords, cell_size=3.0):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+        if len(self.coords):
+            self.origin = self.coords.min(axis=0)
+            cells = self._cells(self.coords)
+            self.shape = cells.max(axis=0) + 1
+        else:
+            self.origin = np.zeros(3)
+            cells = np.empty((0, 3), dtype=np.int64)
+            self.shape = np.ones(3, dtype=np.int64)
+        ids = self._linear(cells)
+        self.order = np.argsort(ids, kind='stable')
+        self.cell_ids, self.starts, counts = np.unique(ids[self.order], return_index=True,
+                                                       return_counts=True)
+        self.stops = self.starts + counts
+
+    def _cells(self, points):
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def _linear(self, cells):
+        nx, ny, _ = self.shape
+        return cells[:, 0] + nx * (cells[:, 1] + ny * cells[:, 2])
+
+    def _candidates(self, lo, hi):
+        """Point indices in the cells overlapping the box [lo, hi]."""
+        c_lo = np.maximum(self._cells(lo[None])[0], 0)
+        c_hi = np.minimum(self._cells(hi[None])[0], self.shape - 1)
+        if np.any(c_hi < c_lo):
+            return np.empty(0, dtype=np.intp)
+        grid = np.stack(np.meshgrid(*[np.arange(a, b + 1) for a, b in zip(c_lo, c_hi)],
+                                    indexing='ij'), axis=-1).reshape(-1, 3)
+        ids = self._linear(grid)
+        pos = np.searchsorted(self.cell_ids, ids)
+        pos = pos[(pos < len(self.cell_ids)) & (self.cell_ids[np.minimum(pos, len(self.cell_ids) - 1)] == ids)]
+        if not len(pos):
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([self.order[self.starts[p]:self.stops[p]] for p in pos])
+
+    def query_radius(self, point, radius):
+        """Indices of the points within ``radius`` of ``point``, nearest first."""
+        point = np.asarray(point, dtype=np.float64)
+        idx = self._candidates(point - radius, point + radius)
+        d2 = np.sum((self.coords[idx] - point) ** 2, axis=1)
+        keep = d2 <= radius * radius
+        idx, d2 = idx[keep], d2[keep]
+        return idx[np.argsort(d2, kind='stable')]
+
+    def pairs(self, cutoff):
+        """
+        All pairs of indexed points closer than ``cutoff``.
+
+        Every occupied cell is paired with itself and with the neighbouring
+        cells in one half-space (so each pair of cells is visited once), and
+        the point pairs of all cell pairs are expanded in bulk with NumPy.
+        The cost is linear in the number of points for a fixed density.
+
+        Returns:
+        --------
+        i, j : ndarray of int
+            Point indices with i < j
+        distance : ndarray
+            Their distances
+        """
+        empty = np.empty(0, dtype=np.intp)
+        if len(self.coords) < 2:
+            return empty, empty, np.empty(0)
+        nx, ny, nz = self.shape
+        cx = self.cell_ids % nx
+        cy = (self.cell_ids // nx) % ny
+        cz = self.cell_ids // (nx * ny)
+        counts = self.stops - self.starts
+        reach = int(np.ceil(cutoff / self.cell_size))
+        span = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(span, span, span, indexing='ij'), axis=-1).reshape(-1, 3)
+        # Half of the neighbourhood: offsets lexicographically >= (0, 0, 0)
+        half = (offsets[:, 2] > 0) | ((offsets[:, 2] == 0) & (offsets[:, 1] > 0)) | \
+               ((offsets[:, 2] == 0) & (offsets[:, 1] == 0) & (offsets[:, 0] >= 0))
+
+        found_i, found_j, found_d = [], [], []
+        for dx, dy, dz in offsets[half]:
+            bx, by, bz = cx + dx, cy + dy, cz + dz
+            inside = (bx >= 0) & (bx < nx) & (by >= 0) & (by < ny) & (bz >= 0) & (bz < nz)
+            a = np.flatnonzero(inside)
+            b_ids = bx[a] + nx * (by[a] + ny * bz[a])
+            pos = np.minimum(np.searchsorted(self.cell_ids, b_ids), len(self.cell_ids) - 1)
+            hit = self.cell_ids[pos] == b_ids
+            a, b = a[hit], pos[hit]
+            if not len(a):
+                continue
+            # Expand the na * nb point pairs of every (a, b) cell pair at once
+            sizes = counts[a] * counts[b]
+            block = np.repeat(np.arange(len(a)), sizes)
+            local = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            nb = counts[b][block]
+            ia, ib = local // nb, local % nb
+            if dx == 0 and dy == 0 and dz == 0:
+                keep = ia < ib
+                block, ia, ib = block[keep], ia[keep], ib[keep]
+            i = self.order[self.starts[a][block] + ia]
+            j = self.order[self.starts[b][block] + ib]
+            d = np.sqrt(np.sum((self.coords[i] - self.coords[j]) ** 2, axis=1))
+            close = d <= cutoff
+            found_i.append(i[close])
+            found_j.append(j[close])
+            found_d.append(d[close])
+        if not found_i:
+            return empty, empty, np.empty(0)
+        i, j, d = np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+        return np.minimum(i, j), np.maximum(i, j), d
+
+    def match(self, points, tolerance=0.05):
+        """
+        Map each point onto the nearest indexed point within ``tolerance``.
+
+        Returns:
+        --------
+        ndarray of int
+            Index of the matched point for every query point, -1 if none
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        matches = np.full(len(points), -1, dtype=np.intp)
+        for k, point in enumerate(points):
+            idx = self.query_radius(point, tolerance)
+            if len(idx):
+                matches[k] = idx[0]
+        return matches
+
+    def crop(self, centers, radius):
+        """Sorted indices of the points within ``radius`` of any of ``centers``."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        if not len(centers):
+            return np.empty(0, dtype=np.intp)
+        # One box query around all centres, then an exact distance test
+        idx = self._candidates(centers.min(axis=0) - radius, centers.max(axis=0) + radius)
+        keep = np.zeros(len(idx), dtype=bool)
+        for center in centers:
+            keep |= np.sum((self.coords[idx] - center) ** 2, axis=1) <= radius * radius
+        return np.sort(idx[keep])
@@ -0,0 +1,272 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class AtomRecord(Mapping):
+    """Read-only dict-like view of a single atom stored in a Structure."""
+
+    __slots__ = ('_structure', '_index')
+
+    def __init__(self, structure, index):
+        self._structure = structure
+        self._index = index
+
+    def __getitem__(self, key):
+        s, i = self._structure, self._index
+        if key == 'element':
+            return s.element_names[s.element_codes[i]]
+        if key == 'label':
+            return s.label_names[s.label_codes[i]]
+        if key in ('x', 'y', 'z'):
+            return float(s.coords[i, 'xyz'.index(key)])
+        if key == 'pot' and s.pots is not None:
+            return int(s.pots[i])
+        if key == 'at#' and s.atom_numbers is not None:
+            return int(s.atom_numbers[i])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._structure.record_keys)
+
+    def __len__(self):
+        return len(self._structure.record_keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class Structure:
+    """
+    Compact structure-of-arrays model for a set of atoms.
+
+    Coordinates are held in a single (n, 3) float64 array, elements and
+    labels as integer codes into interned name tables, and the atoms of
+    each element are reachable through precomputed index slices. Iterating
+    or indexing yields AtomRecord mappings, so code written against the old
+    list-of-dicts representation keeps working.
+
+    Parameters:
+    -----------
+    coords : array_like, shape (n, 3)
+        Cartesian coordinates in Angstrom
+    elements : sequence of str
+        Element symbol of each atom
+    labels : sequence of str, optional
+        Site label of each atom (default: the element symbol)
+    pots : array_like of int, optional
+        FEFF unique potential index of each atom
+    atom_numbers : array_like of int, optional
+        Atomic number of each atom (the ``at#`` column of path files)
+    """
+
+    def __init__(self, coords, elements, labels=None, pots=None, atom_numbers=None):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 3)
+        n = len(self.coords)
+        if len(elements) != n:
+            raise ValueError("elements and coords must have the same length")
+
+        self.element_names, self.element_codes = _intern(elements)
+        if labels is None:
+            self.label_names, self.label_codes = self.element_names, self.element_codes
+        else:
+            self.label_names, self.label_codes = _intern(labels)
+        self.pots = None if pots is None else np.asarray(pots, dtype=np.int32)
+        self.atom_numbers = None if atom_numbers is None else np.asarray(atom_numbers, dtype=np.int32)
+        self._build_index()
+
+    def _build_index(self):
+        keys = ['element', 'label', 'x', 'y', 'z']
+        if self.pots is not None:
+            keys.append('pot')
+        if self.atom_numbers is not None:
+            keys.append('at#')
+        self.record_keys = tuple(keys)
+
+        # Atoms sorted by element; element k occupies order[bounds[k]:bounds[k + 1]]
+        self._order = np.argsort(self.element_codes, kind='stable')
+        counts = np.bincount(self.element_codes, minlength=len(self.element_names))
+        self._bounds = np.concatenate(([0], np.cumsum(counts)))
+        # Bond lists by tolerance, filled by bonds()
+        self._bonds = {}
+
+    @classmethod
+    def from_records(cls, atoms):
+        """Build a Structure from a list of per-atom dicts."""
+        atoms = list(atoms)
+        coords = [[a['x'], a['y'], a['z']] for a in atoms]
+        elements = [a['element'] for a in atoms]
+        labels = [a['label'] for a in atoms] if atoms and 'label' in atoms[0] else None
+        pots = [a['pot'] for a in atoms] if atoms and 'pot' in atoms[0] else None
+        numbers = [a['at#'] for a in atoms] if atoms and 'at#' in atoms[0] else None
+        return cls(coords, elements, labels=labels, pots=pots, atom_numbers=numbers)
+
+    def to_arrays(self, prefix=''):
+        """Return the structure as a dict of NumPy arrays (e.g. for ``np.savez``)."""
+        arrays = {
+            prefix + 'coords': self.coords,
+            prefix + 'element_names': np.array(self.element_names, dtype=str),
+            prefix + 'element_codes': self.element_codes,
+            prefix + 'label_names': np.array(self.label_names, dtype=str),
+            prefix + 'label_codes': self.label_codes,
+        }
+        if self.pots is not None:
+            arrays[prefix + 'pots'] = self.pots
+        if self.atom_numbers is not None:
+            arrays[prefix + 'atom_numbers'] = self.atom_numbers
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=''):
+        """Rebuild a Structure from the output of :meth:`to_arrays` without re-interning."""
+        structure = cls.__new__(cls)
+        structure.coords = np.ascontiguousarray(arrays[prefix + 'coords'], dtype=np.float64)
+        structure.element_names = arrays[prefix + 'element_names'].tolist()
+        structure.element_codes = np.asarray(arrays[prefix + 'element_codes'], dtype=np.int32)
+        structure.label_names = arrays[prefix + 'label_names'].tolist()
+        structure.label_codes = np.asarray(arrays[prefix + 'label_codes'], dtype=np.int32)
+        pots = arrays.get(prefix + 'pots')
+        numbers = arrays.get(prefix + 'atom_numbers')
+        structure.pots = None if pots is None else np.asarray(pots, dtype=np.int32)
+        structure.atom_numbers = None if numbers is None else np.asarray(numbers, dtype=np.int32)
+        structure._build_index()
+        return structure
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("atom index out of range")
+        return AtomRecord(self, index)
+
+    def __iter__(self):
+        return (AtomRecord(self, i) for i in range(len(self)))
+
+    def __repr__(self):
+        counts = ', '.join(f"{e}: {len(self.element_indices(e))}" for e in self.element_names)
+        return f"Structure({len(self)} atoms; {counts})"
+
+    @property
+    def x(self):
+        return self.coords[:, 0]
+
+    @property
+    def y(self):
+        return self.coords[:, 1]
+
+    @property
+    def z(self):
+        return self.coords[:, 2]
+
+    @property
+    def elements(self):
+        """Element symbols in order of first appearance."""
+        return list(self.element_names)
+
+    def element_indices(self, element):
+        """Indices of all atoms of the given element (empty if absent)."""
+        try:
+            k = self.element_names.index(element)
+        except ValueError:
+            return np.empty(0, dtype=np.intp)
+        return self._order[self._bounds[k]:self._bounds[k + 1]]
+
+    def absorber_index(self):
+        """Index of the absorbing atom (ipot 0), else of the atom nearest the origin."""
+        if self.pots is not None:
+            absorbers = np.flatnonzero(self.pots == 0)
+            if len(absorbers):
+                return int(absorbers[0])
+        return int(np.argmin(np.sum(self.coords ** 2, axis=1)))
+
+    def shells(self, center=None, tolerance=0.05):
+        """
+        Group atoms into coordination shells around ``center``.
+
+        Distances are sorted once and a new shell starts wherever the gap to
+        the previous distance exceeds ``tolerance``.
+
+        Parameters:
+        -----------
+        center : int, optional
+            Index of the central atom (default: the absorber)
+        tolerance : float, optional
+            Largest distance gap in Angstrom within one shell (default: 0.05)
+
+        Returns:
+        --------
+        list of (float, ndarray)
+            Mean radius and atom indices of each shell, nearest first; the
+            central atom itself is not included
+        """
+        center = self.absorber_index() if center is None else center
+        dist = np.linalg.norm(self.coords - self.coords[center], axis=1)
+        order = np.argsort(dist, kind='stable')
+        order = order[order != center]
+        if not len(order):
+            return []
+        sorted_dist = dist[order]
+        breaks = np.flatnonzero(np.diff(sorted_dist) > tolerance) + 1
+        return [(float(sorted_dist[chunk].mean()), order[chunk])
+                for chunk in np.split(np.arange(len(order)), breaks)]
+
+    def bonds(self, tolerance=0.45):
+        """
+        Bonded atom pairs, computed once per tolerance and kept with the structure.
+
+        See :func:`bonds.find_bonds`.
+
+        Returns:
+        --------
+        ndarray of int, shape (m, 2)
+            Atom index pairs, i < j
+        """
+        if tolerance not in self._bonds:
+            from bonds import find_bonds
+            self._bonds[tolerance] = find_bonds(self, tolerance=tolerance)
+        return self._bonds[tolerance]
+
+    def element_of(self, index):
+        return self.element_names[self.element_codes[index]]
+
+    def element_names_of_atoms(self):
+        """Element symbol of every atom, in atom order."""
+        names = self.element_names
+        return [names[c] for c in self.element_codes]
+
+    def element_names_of_atoms_at(self, indices):
+        """Element symbols for an index array."""
+        names = self.element_names
+        return [names[c] for c in self.element_codes[indices]]
+
+    def labels_of(self, indices):
+        """Site labels for an index array."""
+        return [self.label_names[c] for c in self.label_codes[indices]]
+
+    def iter_elements(self):
+        """Yield (element, indices) for each element in first-appearance order."""
+        for k, element in enumerate(self.element_names):
+            yield element, self._order[self._bounds[k]:self._bounds[k + 1]]
+
+    def subset(self, indices):
+        """Return a new Structure holding only the atoms at ``indices``."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return Structure(self.coords[indices], self.element_names_of_atoms_at(indices),
+                         labels=self.labels_of(indices),
+                         pots=None if self.pots is None else self.pots[indices],
+                         atom_numbers=None if self.atom_numbers is None else self.atom_numbers[indices])
+
+    def to_records(self):
+        """Return the atoms as a list of plain dicts (the legacy representation)."""
+        return [dict(atom) for atom in self]
+
+
+def _intern(values):
+    """Return (names, codes) with names in order of first appearance."""
+    names = list(dict.fromkeys(values))
+    lookup = {name: code for code, name in enumerate(names)}
+    codes = np.fromiter((lookup[v] for v in values), dtype=np.int32, count=len(values))
+    return names, codes
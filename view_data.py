@@ -0,0 +1,63 @@
+import numpy as np
+
+# Element colours and path geometry shared by the matplotlib viewers and the
+# Plotly export; no matplotlib import here, so the export runs without it
+
+# Define a color map for common elements
+element_colors = {
+    'Fe': 'orange',
+    'O': 'red',
+    'Si': 'orange',
+    'C': 'black',
+    'H': 'white',
+    'N': 'blue',
+    'P': 'purple',
+    'S': 'yellow',
+    'default': 'gray'
+}
+
+def get_element_color(element):
+    """Get color for an element, default to gray if not found."""
+    return element_colors.get(element, element_colors['default'])
+
+# Leg classes of a path, drawn as one line collection each
+LEG_CLASSES = (('Absorber-Scatterer', 'r'), ('Scatterer-Scatterer', 'b'), ('Back to Absorber', 'g'))
+
+def path_leg_segments(paths):
+    """
+    Split the legs of the given paths into the LEG_CLASSES.
+
+    Parameters:
+    -----------
+    paths : list of Structure
+        Path atoms, absorber first, in scattering order
+
+    Returns:
+    --------
+    list of ndarray
+        One (m, 2, 3) segment array per leg class
+    """
+    groups = ([], [], [])
+    for atoms in paths:
+        coords = atoms.coords
+        if len(coords) < 2:
+            continue
+        groups[0].append(coords[None, 0:2])
+        if len(coords) > 2:
+            groups[1].append(np.stack([coords[1:-1], coords[2:]], axis=1))
+        groups[2].append(coords[None, [-1, 0]])
+    return [np.concatenate(g) if g else np.empty((0, 2, 3)) for g in groups]
+
+def radial_segments(paths):
+    """(m, 2, 3) segments from the absorber to every other atom of the given paths."""
+    segments = [np.stack([np.repeat(a.coords[:1], len(a) - 1, axis=0), a.coords[1:]], axis=1)
+                for a in paths if len(a) > 1]
+    return np.concatenate(segments) if segments else np.empty((0, 2, 3))
+
+def unique_path_atoms(paths, decimals=4):
+    """Coordinates and elements of the distinct atom sites visited by the given paths."""
+    coords = np.concatenate([a.coords for a in paths]) if paths else np.empty((0, 3))
+    elements = [e for a in paths for e in a.element_names_of_atoms()]
+    _, first = np.unique(np.round(coords, decimals), axis=0, return_index=True)
+    first.sort()
+    return coords[first], [elements[i] for i in first]